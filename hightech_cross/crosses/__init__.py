@@ -0,0 +1 @@
+default_app_config = 'crosses.apps.CrossesConfig'
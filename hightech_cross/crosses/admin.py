@@ -1,23 +1,272 @@
-from django.contrib import admin
+import typing as t
 
-from . import models
+from django import forms
+from django.contrib import (
+    admin,
+    messages,
+)
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import (
+    ForeignKey,
+    Model,
+    QuerySet,
+)
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    QueryDict,
+)
+from django.shortcuts import (
+    redirect,
+    render,
+)
+from django.urls import (
+    path,
+    reverse,
+)
+from django.utils.html import format_html
+from rest_framework import serializers
+
+from . import (
+    models,
+    sharding,
+)
+from .importer import (
+    import_cross,
+    load_definition,
+)
+from .profiling import get_report
+
+
+SHARD_PARAM = 'shard'
+
+
+class CrossImportForm(forms.Form):
+    definition = forms.FileField(help_text='YAML or JSON cross definition.')
+
+
+class ShardFilter(admin.SimpleListFilter):
+    """Database selector for change list of sharded model.
+
+    Shard is applied by `ShardedAdmin.get_queryset`, so filter only
+    renders the choices.
+    """
+
+    title = 'database'
+    parameter_name = SHARD_PARAM
+
+    def lookups(self, request: HttpRequest, model_admin: admin.ModelAdmin):
+        return [(shard, shard) for shard in sharding.get_shards()]
+
+    def choices(self, changelist) -> t.Iterator[t.Dict[str, t.Any]]:
+        value = self.value() or DEFAULT_DB_ALIAS
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': value == lookup,
+                'query_string': changelist.get_query_string({
+                    self.parameter_name: lookup,
+                }),
+                'display': title,
+            }
+
+    def queryset(self, request: HttpRequest, queryset: QuerySet) -> QuerySet:
+        return queryset
+
+
+class ShardedAdmin(admin.ModelAdmin):
+    """Admin of model living in databases from `sharding.get_shards`.
+
+    Change list shows one database chosen with `ShardFilter`,
+    objects are looked up in every database and edited in place.
+    """
+
+    def get_shard(self, request: HttpRequest) -> str:
+        """Get alias of database request works with."""
+        shard = (
+            getattr(request, '_crosses_shard', None)
+            or request.GET.get(SHARD_PARAM)
+            or QueryDict(request.GET.get('_changelist_filters', '')).get(
+                SHARD_PARAM,
+            )
+        )
+        return shard if shard in sharding.get_shards() else DEFAULT_DB_ALIAS
+
+    def get_list_filter(self, request: HttpRequest) -> list:
+        return [ShardFilter, *super().get_list_filter(request)]
+
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        return super().get_queryset(request).using(self.get_shard(request))
+
+    def get_object(
+        self,
+        request: HttpRequest,
+        object_id: str,
+        from_field: t.Optional[str] = None,
+    ) -> t.Optional[Model]:
+        for shard in sharding.get_shards():
+            request._crosses_shard = shard
+            obj = super().get_object(request, object_id, from_field)
+            if obj is not None:
+                return obj
+        del request._crosses_shard
+        return None
+
+    def formfield_for_foreignkey(
+        self,
+        db_field: ForeignKey,
+        request: HttpRequest,
+        **kwargs,
+    ) -> forms.ModelChoiceField:
+        if db_field.related_model._meta.app_label == self.opts.app_label:
+            kwargs['using'] = self.get_shard(request)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def save_model(
+        self,
+        request: HttpRequest,
+        obj: Model,
+        form: forms.ModelForm,
+        change: bool,
+    ) -> None:
+        obj.save(using=self.get_shard(request))
+
+    def delete_model(self, request: HttpRequest, obj: Model) -> None:
+        obj.delete(using=self.get_shard(request))
 
 
 @admin.register(models.Cross)
-class CrossAdmin(admin.ModelAdmin):
-    pass
+class CrossAdmin(ShardedAdmin):
+    change_list_template = 'admin/crosses/cross/change_list.html'
+    actions = ['generate_join_codes']
+
+    def generate_join_codes(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet,
+    ) -> None:
+        """Create one-time join code for every team without unused one."""
+        join_codes = []
+        for cross in queryset:
+            join_codes += models.JoinCode.generate(cross)
+        self.message_user(
+            request,
+            f'Generated {len(join_codes)} join codes.',
+            messages.SUCCESS,
+        )
+
+    generate_join_codes.short_description = 'Generate team join codes'
+
+    def save_model(
+        self,
+        request: HttpRequest,
+        obj: models.Cross,
+        form: forms.ModelForm,
+        change: bool,
+    ) -> None:
+        if not change:
+            sharding.set_cross_db(obj.id, self.get_shard(request))
+        super().save_model(request, obj, form, change)
+
+    def get_urls(self) -> list:
+        return [
+            path(
+                'import/',
+                self.admin_site.admin_view(self.import_view),
+                name='crosses_cross_import',
+            ),
+        ] + super().get_urls()
+
+    def import_view(self, request: HttpRequest) -> HttpResponse:
+        """Upload cross definition file and import it."""
+        if not self.has_add_permission(request):
+            return redirect('admin:crosses_cross_changelist')
+        form = CrossImportForm(request.POST or None, request.FILES or None)
+        if form.is_valid():
+            try:
+                definition = load_definition(form.cleaned_data['definition'])
+            except serializers.ValidationError as error:
+                form.add_error('definition', str(error.detail))
+            else:
+                cross = import_cross(definition)
+                self.message_user(
+                    request,
+                    f'Imported cross "{cross.name}".',
+                    messages.SUCCESS,
+                )
+                return redirect(
+                    f'{reverse("admin:crosses_cross_changelist")}'
+                    f'?{SHARD_PARAM}={cross._state.db}',
+                )
+        return render(request, 'admin/crosses/cross/import.html', {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'form': form,
+            'title': 'Import cross',
+        })
 
 
 @admin.register(models.Mission)
-class MissionAdmin(admin.ModelAdmin):
+class MissionAdmin(ShardedAdmin):
     pass
 
 
 @admin.register(models.Prompt)
-class PromptAdmin(admin.ModelAdmin):
+class PromptAdmin(ShardedAdmin):
     pass
 
 
 @admin.register(models.ProgressLog)
-class ProgressLogAdmin(admin.ModelAdmin):
+class ProgressLogAdmin(ShardedAdmin):
     pass
+
+
+@admin.register(models.JoinCode)
+class JoinCodeAdmin(ShardedAdmin):
+    list_display = ['code', 'cross', 'user', 'used_at']
+    list_filter = ['cross']
+
+
+@admin.register(models.RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'view', 'duration']
+    list_filter = ['view']
+    fields = ['created_at', 'method', 'path', 'view', 'duration', 'report']
+    readonly_fields = fields
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def get_urls(self) -> list:
+        return [
+            path(
+                '<uuid:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='crosses_requestprofile_download',
+            ),
+        ] + super().get_urls()
+
+    def report(self, instance: models.RequestProfile) -> str:
+        """Top calls by cumulative time and `.pstats` file link."""
+        return format_html(
+            '<a href="{}">Download .pstats</a><pre>{}</pre>',
+            reverse(
+                'admin:crosses_requestprofile_download',
+                args=[instance.id],
+            ),
+            get_report(instance),
+        )
+
+    def download_view(self, request: HttpRequest, pk: str) -> HttpResponse:
+        """Get profile as `.pstats` file."""
+        profile = models.RequestProfile.objects.filter(id=pk).first()
+        if profile is None or not self.has_view_permission(request, profile):
+            raise Http404
+        response = HttpResponse(
+            bytes(profile.stats),
+            content_type='application/octet-stream',
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{profile.id}.pstats"'
+        )
+        return response
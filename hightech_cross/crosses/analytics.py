@@ -0,0 +1,180 @@
+"""Mission analytics for organizers.
+
+Progress logs are rolled up into per-minute `MissionStats` buckets
+incrementally, so analytics queries never scan the live log table.
+Every shard database keeps rollups of its own crosses.
+
+Attributes:
+    ROLLUP_NAME (str): `RollupState` name for mission stats.
+    ROLLUP_LAG (timedelta): Logs younger than that are left for later,
+        so slow transactions commit before the high-water mark passes them.
+"""
+import typing as t
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    transaction,
+)
+from django.db.models import (
+    Count,
+    Q,
+    Sum,
+)
+from django.db.models.functions import TruncMinute
+from django.utils.timezone import now
+
+from . import models
+
+ROLLUP_NAME = 'mission-stats'
+ROLLUP_LAG = timedelta(seconds=10)
+
+
+def refresh_rollups(
+    until: t.Optional[datetime] = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> int:
+    """Roll up logs of database `using` created since last refresh.
+
+    Return number of buckets touched.
+    """
+    if until is None:
+        until = now() - ROLLUP_LAG
+    with transaction.atomic(using=using):
+        return _refresh_rollups(until, using)
+
+
+def _refresh_rollups(until: datetime, using: str) -> int:
+    states = models.RollupState.objects.using(using)
+    states.get_or_create(
+        name=ROLLUP_NAME,
+        defaults={
+            'high_water_mark': datetime.min.replace(tzinfo=until.tzinfo),
+        },
+    )
+    state = states.select_for_update().get(
+        name=ROLLUP_NAME,
+    )
+    if state.high_water_mark >= until:
+        return 0
+    rows = models.ProgressLog.objects.using(using).filter(
+        created_at__gte=state.high_water_mark,
+        created_at__lt=until,
+    ).annotate(
+        minute=TruncMinute('created_at'),
+    ).values(
+        'mission_id',
+        'mission__cross_id',
+        'minute',
+    ).order_by().annotate(
+        prompts_taken=Count(
+            'id',
+            filter=Q(event=models.ProgressEvent.GET_PROMPT),
+        ),
+        wrong_answers=Count(
+            'id',
+            filter=Q(event=models.ProgressEvent.WRONG_ANSWER),
+        ),
+        right_answers=Count(
+            'id',
+            filter=Q(event=models.ProgressEvent.RIGHT_ANSWER),
+        ),
+    )
+    rows = {(row['mission_id'], row['minute']): row for row in rows}
+    counters = ['prompts_taken', 'wrong_answers', 'right_answers']
+    stats_objects = models.MissionStats.objects.using(using)
+    existing = stats_objects.filter(
+        mission_id__in={mission_id for mission_id, _ in rows},
+        minute__in={minute for _, minute in rows},
+    )
+    to_update = []
+    for stats in existing:
+        row = rows.pop((stats.mission_id, stats.minute), None)
+        if row is None:
+            continue
+        for counter in counters:
+            setattr(stats, counter, getattr(stats, counter) + row[counter])
+        to_update.append(stats)
+    to_create = [
+        models.MissionStats(
+            cross_id=row['mission__cross_id'],
+            mission_id=row['mission_id'],
+            minute=row['minute'],
+            **{counter: row[counter] for counter in counters},
+        )
+        for row in rows.values()
+    ]
+    stats_objects.bulk_update(to_update, counters)
+    stats_objects.bulk_create(to_create)
+    state.high_water_mark = until
+    state.save()
+    return len(to_update) + len(to_create)
+
+
+def _median(values: t.List[t.Tuple[timedelta, int]]) -> t.Optional[timedelta]:
+    """Get median of sorted values with counts."""
+    total = sum(count for _, count in values)
+    seen = 0
+    for value, count in values:
+        seen += count
+        if seen * 2 >= total:
+            return value
+    return None
+
+
+def get_mission_analytics(cross: models.Cross) -> t.Dict[str, t.Any]:
+    """Get rolled up stats for every mission of cross.
+
+    Solve time is measured from cross start with minute precision.
+    """
+    teams = cross.users.count()
+    totals = {
+        row['mission_id']: row
+        for row in cross.mission_stats.values(
+            'mission_id',
+        ).order_by().annotate(
+            prompts_taken=Sum('prompts_taken'),
+            wrong_answers=Sum('wrong_answers'),
+            right_answers=Sum('right_answers'),
+        )
+    }
+    solve_minutes: t.Dict[t.Any, t.List[t.Tuple[timedelta, int]]] = {}
+    for mission_id, minute, right_answers in cross.mission_stats.filter(
+        right_answers__gt=0,
+    ).order_by(
+        'minute',
+    ).values_list(
+        'mission_id',
+        'minute',
+        'right_answers',
+    ):
+        solve_minutes.setdefault(mission_id, []).append((
+            max(minute - cross.begins_at, timedelta(0)),
+            right_answers,
+        ))
+    missions = []
+    for mission in cross.missions.all():
+        total = totals.get(mission.id, {})
+        solved = total.get('right_answers', 0)
+        missions.append({
+            'sn': mission.sn,
+            'name': mission.name,
+            'solved': solved,
+            'solve_rate': solved / teams if teams else 0,
+            'median_solve_time': _median(solve_minutes.get(mission.id, [])),
+            'prompts_taken': total.get('prompts_taken', 0),
+            'wrong_answers': total.get('wrong_answers', 0),
+        })
+    state = models.RollupState.objects.using(
+        cross._state.db,
+    ).filter(
+        name=ROLLUP_NAME,
+    ).first()
+    return {
+        'updated_until': state and state.high_water_mark,
+        'teams': teams,
+        'missions': missions,
+    }
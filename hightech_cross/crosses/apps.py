@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class CrossesConfig(AppConfig):
     name = 'crosses'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,188 @@
+"""Async read views for `crosses` app.
+
+Hot polling endpoints are served by these views when running under ASGI.
+Event loop only waits for DB work done in a bounded thread pool,
+so slow queries hold a pool thread (and its DB connection)
+instead of a whole worker.
+"""
+import asyncio
+import functools
+import typing as t
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    HttpResponseNotAllowed,
+    JsonResponse,
+)
+from rest_framework import exceptions
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import (
+    cache,
+    models,
+)
+from .authentication import (
+    SignedTokenAuthentication,
+    TokenUser,
+)
+from .profiling import (
+    PROFILE_ID_HEADER,
+    RequestProfiler,
+    should_profile,
+)
+from .views import (
+    COMPACT_MEDIA_TYPE,
+    find_cross,
+    find_current_cross,
+    get_cross_payload,
+    get_mission_list,
+    get_prompt_list,
+    rendered_response,
+    wants_compact,
+)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'CROSSES_ASYNC_DB_THREADS', 8),
+    thread_name_prefix='crosses-db',
+)
+
+
+def _run_db_job(func: t.Callable, *args, **kwargs) -> t.Any:
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run_db(func: t.Callable, *args, **kwargs) -> t.Any:
+    """Run sync DB code in the bounded thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _executor,
+        functools.partial(_run_db_job, func, *args, **kwargs),
+    )
+
+
+def _get_authenticators() -> t.List[t.Any]:
+    return [
+        authentication_class()
+        for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    ]
+
+
+def _authenticate(request: HttpRequest) -> None:
+    authenticators = [
+        authenticator
+        for authenticator in _get_authenticators()
+        if not isinstance(authenticator, SignedTokenAuthentication)
+    ]
+    request.user = Request(request, authenticators=authenticators).user
+
+
+def _build_authenticated(
+    build: t.Callable,
+    request: HttpRequest,
+    **kwargs,
+) -> t.Tuple[t.Any, t.Optional[models.RequestProfile]]:
+    if not isinstance(getattr(request, 'user', None), TokenUser):
+        _authenticate(request)
+    if not request.user.is_authenticated:
+        raise exceptions.NotAuthenticated
+    if not should_profile(request):
+        return build(request, **kwargs), None
+    profiler = RequestProfiler()
+    try:
+        data = build(request, **kwargs)
+    finally:
+        profiler.stop()
+    return data, profiler.save(request, build.__name__)
+
+
+def async_read_view(build: t.Callable) -> t.Callable:
+    """Make async GET view from sync payload builder.
+
+    Signed token is verified in the event loop. Other authentication
+    classes of `DEFAULT_AUTHENTICATION_CLASSES` (like session or basic)
+    touch DB, so they are run by `run_db` with everything else.
+    Selected requests are profiled in the DB thread like `ProfilingMixin`
+    does for viewsets, so pure async overhead is not in the profile.
+    """
+    @functools.wraps(build)
+    async def view(request: HttpRequest, **kwargs) -> HttpResponse:
+        if request.method != 'GET':
+            return HttpResponseNotAllowed(['GET'])
+        try:
+            auth = SignedTokenAuthentication().authenticate(request)
+            if auth is not None:
+                request.user = auth[0]
+            data, profile = await run_db(
+                _build_authenticated,
+                build,
+                request,
+                **kwargs,
+            )
+        except exceptions.APIException as error:
+            response = JsonResponse(
+                {'detail': str(error.detail)},
+                status=error.status_code,
+            )
+            if isinstance(error, (
+                exceptions.NotAuthenticated,
+                exceptions.AuthenticationFailed,
+            )):
+                header = _get_authenticators()[0].authenticate_header(request)
+                if header:
+                    response['WWW-Authenticate'] = header
+            return response
+        except Http404:
+            return JsonResponse({'detail': 'Not found.'}, status=404)
+        if isinstance(data, cache.Rendered):
+            content_type = 'application/json'
+            if wants_compact(request):
+                content_type = COMPACT_MEDIA_TYPE
+            response = rendered_response(request, data, content_type)
+        else:
+            response = HttpResponse(
+                JSONRenderer().render(data),
+                content_type='application/json',
+            )
+        if profile is not None:
+            response[PROFILE_ID_HEADER] = str(profile.id)
+        return response
+
+    return view
+
+
+@async_read_view
+def current_cross(request: HttpRequest) -> cache.Rendered:
+    """Current cross info + leaderboard."""
+    cross = find_current_cross(request.user)
+    return get_cross_payload(cross, wants_compact(request))
+
+
+@async_read_view
+def mission_list(
+    request: HttpRequest,
+    cross_pk: str,
+) -> t.List[t.Dict[str, t.Any]]:
+    """Mission stati for user (team)."""
+    return get_mission_list(request, find_cross(request.user, cross_pk))
+
+
+@async_read_view
+def prompt_list(
+    request: HttpRequest,
+    cross_pk: str,
+    mission_pk: str,
+) -> t.List[t.Dict[str, t.Any]]:
+    """Mission prompts, texts are shown only for taken ones."""
+    cross = find_cross(request.user, cross_pk)
+    return get_prompt_list(request, cross, mission_pk)
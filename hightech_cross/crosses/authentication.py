@@ -0,0 +1,95 @@
+"""Stateless signed token authentication for `crosses` API.
+
+Token carries user (team) ID and cross ID and is verified
+with `SECRET_KEY` only, without session or user table reads.
+
+Attributes:
+    TOKEN_KEYWORD (str): `Authorization` header scheme.
+    TOKEN_SALT (str): Signing salt separating tokens from other signed data.
+"""
+import typing as t
+import uuid
+
+from django.conf import settings
+from django.core import signing
+from rest_framework import (
+    authentication,
+    exceptions,
+)
+from rest_framework.request import Request
+
+TOKEN_KEYWORD = 'Token'
+TOKEN_SALT = 'crosses.authentication'
+
+
+class TokenUser:
+    """User (team) identified by token without fetching it from DB.
+
+    Attributes:
+        id (int): User PK.
+        cross_id (uuid.UUID): Cross the token was issued for.
+    """
+
+    is_authenticated = True
+    is_anonymous = False
+    is_active = True
+    is_staff = False
+    is_superuser = False
+
+    def __init__(self, user_id: int, cross_id: uuid.UUID):
+        self.id = self.pk = user_id
+        self.cross_id = cross_id
+
+    def __str__(self) -> str:
+        return f'TokenUser {self.id}'
+
+
+def get_token_max_age() -> int:
+    """Get token lifetime in seconds."""
+    return getattr(settings, 'CROSSES_TOKEN_MAX_AGE', 60 * 60 * 24)
+
+
+def make_token(user_id: int, cross_id: uuid.UUID) -> str:
+    """Issue signed token for user (team) in cross."""
+    return signing.dumps(
+        {'u': user_id, 'c': str(cross_id)},
+        salt=TOKEN_SALT,
+        compress=True,
+    )
+
+
+def read_token(token: str) -> TokenUser:
+    """Verify token signature and age and get its user."""
+    try:
+        payload = signing.loads(
+            token,
+            salt=TOKEN_SALT,
+            max_age=get_token_max_age(),
+        )
+        return TokenUser(payload['u'], uuid.UUID(payload['c']))
+    except signing.SignatureExpired:
+        raise exceptions.AuthenticationFailed('Token expired.')
+    except (signing.BadSignature, KeyError, TypeError, ValueError):
+        raise exceptions.AuthenticationFailed('Invalid token.')
+
+
+class SignedTokenAuthentication(authentication.BaseAuthentication):
+    """Authenticate by `Authorization: Token <token>` header."""
+
+    def authenticate(
+        self,
+        request: Request,
+    ) -> t.Optional[t.Tuple[TokenUser, str]]:
+        header = authentication.get_authorization_header(request).split()
+        if not header or header[0].lower() != TOKEN_KEYWORD.lower().encode():
+            return None
+        if len(header) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        try:
+            token = header[1].decode()
+        except UnicodeError:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+        return read_token(token), token
+
+    def authenticate_header(self, request: Request) -> str:
+        return TOKEN_KEYWORD
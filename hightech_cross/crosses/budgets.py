@@ -0,0 +1,192 @@
+"""Query budgets for heavy reads.
+
+Read endpoints run their queries under `SET LOCAL statement_timeout`
+from `CROSSES_STATEMENT_TIMEOUTS` setting (milliseconds by endpoint).
+Leaderboard is served from the last good copy marked stale instead of
+being computed if its budget is exceeded, if answers or prompts are being
+written by the process or if enough leaderboards are computed already.
+A single background refresh is run meanwhile, but not while the process
+is writing: the refresh would read data about to change.
+So overload degrades freshness rather than availability.
+
+Attributes:
+    STALE_WARNING (str): `Warning` header value for stale responses.
+    QUERY_CANCELED (str): Postgres error code of exceeded statement timeout.
+    REFRESH_LOCK_TIMEOUT (int): Max background refresh duration in seconds.
+"""
+import contextlib
+import logging
+import threading
+import typing as t
+
+from django.conf import settings
+from django.core.cache import cache as django_cache
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    OperationalError,
+    close_old_connections,
+    connections,
+    transaction,
+)
+from rest_framework import (
+    exceptions,
+    status,
+)
+
+from . import (
+    cache,
+    models,
+    sharding,
+)
+
+logger = logging.getLogger(__name__)
+
+STALE_WARNING = '110 - "Response is Stale"'
+QUERY_CANCELED = '57014'
+REFRESH_LOCK_TIMEOUT = 60
+
+
+class BudgetExceeded(exceptions.APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Server is busy, try again later.'
+    default_code = 'budget_exceeded'
+
+
+class RunningCounter:
+    """Thread-safe counter of blocks running in the process.
+
+    Attributes:
+        value (int): Blocks running.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def running(self) -> t.Iterator[None]:
+        """Count block while it runs."""
+        with self._lock:
+            self.value += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.value -= 1
+
+
+_writes = RunningCounter()
+_builds = RunningCounter()
+
+
+def write_priority() -> t.ContextManager[None]:
+    """Mark a write running, leaderboards are not computed meanwhile."""
+    return _writes.running()
+
+
+def is_writing() -> bool:
+    """Learn if answers or prompts are being written by the process."""
+    return _writes.value > 0
+
+
+def is_overloaded() -> bool:
+    """Learn if leaderboard should be served stale instead of computed."""
+    return is_writing() or _builds.value >= getattr(
+        settings,
+        'CROSSES_MAX_LEADERBOARD_BUILDS',
+        2,
+    )
+
+
+@contextlib.contextmanager
+def statement_timeout(
+    endpoint: str,
+    using: str = DEFAULT_DB_ALIAS,
+) -> t.Iterator[None]:
+    """Run block queries under endpoint budget.
+
+    Block is run in a transaction, as `SET LOCAL` lasts until its end.
+    Exceeded budget is raised as `BudgetExceeded`.
+    """
+    milliseconds = getattr(
+        settings,
+        'CROSSES_STATEMENT_TIMEOUTS',
+        {},
+    ).get(endpoint)
+    connection = connections[using]
+    try:
+        with transaction.atomic(using=using):
+            if milliseconds and connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        'SET LOCAL statement_timeout = %s',
+                        [milliseconds],
+                    )
+            yield
+    except OperationalError as error:
+        if getattr(error.__cause__, 'pgcode', None) != QUERY_CANCELED:
+            raise
+        logger.warning('%s budget of %s ms exceeded', endpoint, milliseconds)
+        raise BudgetExceeded
+
+
+def _get_data(entity: str, cross: models.Cross) -> cache.Rendered:
+    if entity == 'compact-data':
+        return cache.get_compact_data(cross)
+    return cache.get_cross_data(cross)
+
+
+def _refresh(entity: str, cross: models.Cross, lock_key: str) -> None:
+    close_old_connections()
+    try:
+        with statement_timeout(
+            'leaderboard-refresh',
+            sharding.get_cross_db(cross.id),
+        ):
+            _get_data(entity, cross)
+    except Exception:
+        logger.exception('Leaderboard refresh of cross %s failed', cross.id)
+    finally:
+        django_cache.delete(lock_key)
+        close_old_connections()
+
+
+def refresh_in_background(entity: str, cross: models.Cross) -> None:
+    """Recompute leaderboard payload unless already being recomputed."""
+    lock_key = f'crosses:refreshing:{entity}:{cross.id}'
+    if not django_cache.add(lock_key, True, REFRESH_LOCK_TIMEOUT):
+        return
+    threading.Thread(
+        target=_refresh,
+        args=(entity, cross, lock_key),
+        name=f'crosses-refresh-{cross.id}',
+        daemon=True,
+    ).start()
+
+
+def get_leaderboard_data(
+    cross: models.Cross,
+    compact: bool = False,
+) -> cache.Rendered:
+    """Get serialized cross with leaderboard within `cross` budget.
+
+    Last good copy is returned if fresh one can't be had cheaply.
+    """
+    entity = 'compact-data' if compact else 'cross-data'
+    data = cache.peek(entity, cross.id)
+    if data is not None:
+        return data
+    last_good = cache.get_last_good(entity, cross.id)
+    if last_good is not None and is_overloaded():
+        if not is_writing():
+            refresh_in_background(entity, cross)
+        return last_good
+    try:
+        with _builds.running():
+            with statement_timeout('cross', sharding.get_cross_db(cross.id)):
+                return _get_data(entity, cross)
+    except BudgetExceeded:
+        if last_good is None:
+            raise
+        refresh_in_background(entity, cross)
+        return last_good
@@ -0,0 +1,295 @@
+"""Hot path caches for `crosses` app.
+
+Entries are kept in the default Django cache and dropped
+by model signals (see `signals.py`) when underlying data changes
+is committed.
+Other processes are told to drop them too (see `notifications.py`).
+Large payloads are kept already rendered and compressed,
+so compression costs once per change instead of once per request.
+Last good copies of leaderboard payloads outlive their invalidation
+to be served stale under load (see `budgets.py`).
+
+Entries live long only while this process listens to notifications,
+otherwise changes made by other processes would go unnoticed.
+
+Attributes:
+    TIMEOUT (int): Cache entry lifetime in seconds.
+    LEADERBOARD_ENTITIES (t.Tuple[str, ...]): Entries depending on standings.
+"""
+import gzip
+import hashlib
+import time
+import typing as t
+import uuid
+from datetime import datetime
+
+from django.core.cache import cache
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    transaction,
+)
+from django.utils.timezone import now
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from . import (
+    models,
+    notifications,
+    sharding,
+)
+from .serializers import (
+    CatalogMissionSerializer,
+    CompactCrossSerializer,
+    CrossSerializer,
+)
+
+TIMEOUT = 60 * 60
+LEADERBOARD_ENTITIES = ('cross-data', 'compact-data')
+
+
+class Rendered(t.NamedTuple):
+    """Payload rendered to JSON in every supported content encoding.
+
+    Attributes:
+        data (t.Any): Payload itself, `None` for shared snapshots.
+        etag (str): Payload version.
+        bodies (t.Dict[str, t.Union[bytes, memoryview]]): JSON
+            by content encoding.
+        stale (bool): Payload is a last good copy of invalidated one.
+        read_at (float): Time reading of payload data began,
+            changes committed earlier are in it.
+    """
+
+    data: t.Any
+    etag: str
+    bodies: t.Dict[str, t.Union[bytes, memoryview]]
+    stale: bool = False
+    read_at: float = 0.0
+
+
+def get_timeout(frozen: bool = False) -> t.Optional[int]:
+    """Get lifetime of new cache entry in seconds.
+
+    Frozen entries never change and live forever
+    if this process gets notified when they are dropped.
+    """
+    return notifications.get_cache_timeout(None if frozen else TIMEOUT)
+
+
+def _key(entity: str, entity_id: t.Any) -> str:
+    return f'crosses:{entity}:{entity_id}'
+
+
+def render(
+    data: t.Any,
+    etag: t.Optional[str] = None,
+    read_at: t.Optional[float] = None,
+) -> Rendered:
+    """Render payload to JSON and compress it.
+
+    Data is taken as read right now unless `read_at` is given.
+    """
+    if read_at is None:
+        read_at = time.time()
+    body = JSONRenderer().render(data)
+    if etag is None:
+        etag = hashlib.sha1(body).hexdigest()
+    bodies = {
+        'identity': body,
+        'gzip': gzip.compress(body, mtime=0),
+    }
+    if brotli is not None:
+        bodies['br'] = brotli.compress(body)
+    return Rendered(data, etag, bodies, read_at=read_at)
+
+
+def get_cross(cross_id: uuid.UUID) -> t.Optional[models.Cross]:
+    """Get cross instance by ID."""
+    key = _key('cross', cross_id)
+    cross = cache.get(key)
+    if cross is None:
+        cross = models.Cross.objects.using(
+            sharding.get_cross_db(cross_id),
+        ).filter(
+            id=cross_id,
+        ).first()
+        if cross is not None:
+            cache.set(key, cross, get_timeout())
+    return cross
+
+
+def get_user_crosses(user_id: int) -> t.List[t.Tuple[datetime, uuid.UUID]]:
+    """Get start dates and IDs of user crosses ordered by start date."""
+    key = _key('user-crosses', user_id)
+    crosses = cache.get(key)
+    if crosses is None:
+        crosses = list(models.UserCross.objects.filter(
+            user_id=user_id,
+        ).order_by(
+            'begins_at',
+        ).values_list(
+            'begins_at',
+            'cross_id',
+        ))
+        cache.set(key, crosses, get_timeout())
+    return crosses
+
+
+def get_current_cross(
+    user_id: int,
+    cross_id: t.Optional[uuid.UUID] = None,
+) -> t.Optional[models.Cross]:
+    """Get last of crosses ever started for user.
+
+    If `cross_id` is given, get it only if already started.
+    """
+    moment = now()
+    if cross_id is None:
+        started = [
+            started_cross_id
+            for begins_at, started_cross_id in get_user_crosses(user_id)
+            if begins_at <= moment
+        ]
+        if not started:
+            return None
+        cross_id = started[-1]
+    cross = get_cross(cross_id)
+    if cross is None or cross.begins_at > moment:
+        return None
+    return cross
+
+
+def get_catalog(cross_id: uuid.UUID) -> Rendered:
+    """Get static mission info of cross with its content hash."""
+    key = _key('catalog', cross_id)
+    catalog = cache.get(key)
+    if catalog is None:
+        missions = models.Mission.objects.using(
+            sharding.get_cross_db(cross_id),
+        ).filter(
+            cross_id=cross_id,
+        ).prefetch_related(
+            'prompts',
+        )
+        missions = CatalogMissionSerializer(missions, many=True).data
+        content_hash = hashlib.sha1(
+            JSONRenderer().render(missions),
+        ).hexdigest()
+        catalog = render(
+            {
+                'hash': content_hash,
+                'missions': missions,
+            },
+            etag=content_hash,
+        )
+        cache.set(key, catalog, get_timeout())
+    return catalog
+
+
+def _get_leaderboard_data(
+    entity: str,
+    cross: models.Cross,
+    serializer_class: t.Type,
+    frozen: bool,
+) -> Rendered:
+    key = _key(entity, cross.id)
+    data = cache.get(key)
+    if data is None:
+        read_at = time.time()
+        data = render(serializer_class(cross).data, read_at=read_at)
+        cache.set(key, data, get_timeout(frozen))
+        cache.set(_key(f'last-good-{entity}', cross.id), data, None)
+    return data
+
+
+def get_cross_data(
+    cross: models.Cross,
+    frozen: bool = False,
+) -> Rendered:
+    """Get serialized cross with leaderboard."""
+    return _get_leaderboard_data(
+        'cross-data',
+        cross,
+        CrossSerializer,
+        frozen,
+    )
+
+
+def get_compact_data(
+    cross: models.Cross,
+    frozen: bool = False,
+) -> Rendered:
+    """Get serialized cross with compact leaderboard."""
+    return _get_leaderboard_data(
+        'compact-data',
+        cross,
+        CompactCrossSerializer,
+        frozen,
+    )
+
+
+def peek(entity: str, cross_id: uuid.UUID) -> t.Optional[Rendered]:
+    """Get cached leaderboard payload without computing it."""
+    return cache.get(_key(entity, cross_id))
+
+
+def is_outdated(entity: str, cross_id: uuid.UUID, data: Rendered) -> bool:
+    """Learn if payload was read before this process last dropped it."""
+    dropped_at = notifications.get_dropped_at(_key(entity, cross_id))
+    return dropped_at >= data.read_at
+
+
+def get_last_good(entity: str, cross_id: uuid.UUID) -> t.Optional[Rendered]:
+    """Get last computed leaderboard payload marked stale."""
+    data = cache.get(_key(f'last-good-{entity}', cross_id))
+    return data and data._replace(stale=True)
+
+
+def _drop(keys: t.List[str], using: str) -> None:
+    def drop() -> None:
+        notifications.drop(keys)
+        notifications.publish(keys)
+
+    transaction.on_commit(drop, using=using)
+
+
+def invalidate(
+    cross_id: uuid.UUID,
+    *entities: str,
+    using: str = DEFAULT_DB_ALIAS,
+) -> None:
+    """Drop cross entries of given kinds once `using` DB commits.
+
+    Entities are `cross`, `catalog` and `LEADERBOARD_ENTITIES`.
+    Entries cached from uncommitted data meanwhile are dropped too.
+    """
+    _drop([_key(entity, cross_id) for entity in entities], using)
+
+
+def invalidate_users(
+    user_ids: t.Iterable[int],
+    using: str = DEFAULT_DB_ALIAS,
+) -> None:
+    """Drop user cross lists once `using` DB commits."""
+    _drop([_key('user-crosses', user_id) for user_id in user_ids], using)
+
+
+def warm_up(cross: models.Cross) -> None:
+    """Fill all cross caches before its start."""
+    get_cross(cross.id)
+    for user_id in cross.users.values_list('id', flat=True):
+        get_user_crosses(user_id)
+    get_catalog(cross.id)
+    get_cross_data(cross)
+    get_compact_data(cross)
+
+
+def finalize(cross: models.Cross) -> None:
+    """Freeze final standings of finished cross and drop hot path caches."""
+    invalidate(cross.id, 'catalog', *LEADERBOARD_ENTITIES)
+    get_cross_data(cross, frozen=True)
+    get_compact_data(cross, frozen=True)
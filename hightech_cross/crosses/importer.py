@@ -0,0 +1,280 @@
+"""Bulk cross definition import for `crosses` app.
+
+Cross definition is a YAML (or JSON) document like this::
+
+    id: 6f1c0d3e-3a0f-4c4e-9d59-0d1a2b3c4d5e  # Optional.
+    name: Spring cross
+    begins_at: 2020-05-01T10:00:00+03:00
+    ends_at: 2020-05-01T14:00:00+03:00
+    prompt_penalty: '00:15:00'  # Optional.
+    wrong_answer_penalty: '00:30:00'  # Optional.
+    teams:
+    - username: team1
+      password: secret  # Optional.
+    missions:
+    - sn: 1
+      name: Old tower
+      description: How many windows are there?
+      lat: 55.75222
+      lon: 37.61556
+      answer: '12'
+      prompt_penalty: '00:10:00'  # Optional, cross one by default.
+      prompts:
+      - sn: 1
+        text: Count both sides.
+
+Everything is validated in memory first, then written in bulk
+inside one transaction. Missions and prompts already present
+are updated by s/n, so re-import is repeatable.
+New crosses are placed to shards by `sharding.place_cross`.
+"""
+import typing as t
+import uuid
+
+import yaml
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from rest_framework import serializers
+
+from . import (
+    cache,
+    models,
+    sharding,
+)
+
+
+class PromptImportSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = models.Prompt
+        fields = [
+            'sn',
+            'text',
+        ]
+
+
+class MissionImportSerializer(serializers.ModelSerializer):
+    prompts = PromptImportSerializer(many=True, required=False)
+
+    class Meta:
+        model = models.Mission
+        fields = [
+            'sn',
+            'name',
+            'description',
+            'lat',
+            'lon',
+            'answer',
+            'prompt_penalty',
+            'wrong_answer_penalty',
+            'prompts',
+        ]
+
+    def validate_prompts(
+        self,
+        value: t.List[t.Dict[str, t.Any]],
+    ) -> t.List[t.Dict[str, t.Any]]:
+        sns = [prompt['sn'] for prompt in value]
+        if len(sns) != len(set(sns)):
+            raise serializers.ValidationError('Prompt s/n must be unique.')
+        return value
+
+
+class TeamImportSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150)
+    password = serializers.CharField(required=False)
+
+
+class CrossImportSerializer(serializers.ModelSerializer):
+    id = serializers.UUIDField(required=False)
+    teams = TeamImportSerializer(many=True, required=False)
+    missions = MissionImportSerializer(many=True, required=False)
+
+    class Meta:
+        model = models.Cross
+        fields = [
+            'id',
+            'name',
+            'begins_at',
+            'ends_at',
+            'prompt_penalty',
+            'wrong_answer_penalty',
+            'teams',
+            'missions',
+        ]
+
+    def validate_teams(
+        self,
+        value: t.List[t.Dict[str, t.Any]],
+    ) -> t.List[t.Dict[str, t.Any]]:
+        usernames = [team['username'] for team in value]
+        if len(usernames) != len(set(usernames)):
+            raise serializers.ValidationError('Usernames must be unique.')
+        return value
+
+    def validate_missions(
+        self,
+        value: t.List[t.Dict[str, t.Any]],
+    ) -> t.List[t.Dict[str, t.Any]]:
+        sns = [mission['sn'] for mission in value]
+        if len(sns) != len(set(sns)):
+            raise serializers.ValidationError('Mission s/n must be unique.')
+        return value
+
+    def validate(self, attrs: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+        if attrs['begins_at'] >= attrs['ends_at']:
+            raise serializers.ValidationError(
+                'Cross must begin before it ends.',
+            )
+        return attrs
+
+
+def load_definition(stream: t.Union[str, bytes, t.IO]) -> t.Dict[str, t.Any]:
+    """Parse and validate cross definition from YAML or JSON."""
+    try:
+        data = yaml.safe_load(stream)
+    except yaml.YAMLError as error:
+        raise serializers.ValidationError(f'Invalid YAML: {error}')
+    serializer = CrossImportSerializer(data=data)
+    serializer.is_valid(raise_exception=True)
+    return serializer.validated_data
+
+
+def _import_teams(
+    cross: models.Cross,
+    teams: t.List[t.Dict[str, t.Any]],
+) -> None:
+    usernames = [team['username'] for team in teams]
+    existing = set(User.objects.filter(
+        username__in=usernames,
+    ).values_list('username', flat=True))
+    User.objects.bulk_create([
+        User(
+            username=team['username'],
+            password=make_password(team.get('password')),
+        )
+        for team in teams
+        if team['username'] not in existing
+    ])
+    cross.users.add(*User.objects.filter(
+        username__in=usernames,
+    ).values_list(
+        'id',
+        flat=True,
+    ))
+
+
+def _import_missions(
+    cross: models.Cross,
+    missions: t.List[t.Dict[str, t.Any]],
+) -> None:
+    mission_fields = [
+        'name',
+        'description',
+        'lat',
+        'lon',
+        'answer',
+        'prompt_penalty',
+        'wrong_answer_penalty',
+    ]
+    database = cross._state.db
+    existing = {
+        mission.sn: mission
+        for mission in cross.missions.all()
+    }
+    to_create = []
+    to_update = []
+    for data in missions:
+        mission = existing.get(data['sn'])
+        if mission is None:
+            mission = models.Mission(cross=cross, sn=data['sn'])
+            to_create.append(mission)
+        else:
+            to_update.append(mission)
+        for field in mission_fields:
+            setattr(mission, field, data.get(field))
+    models.Mission.objects.using(database).bulk_create(to_create)
+    models.Mission.objects.using(database).bulk_update(
+        to_update,
+        mission_fields,
+    )
+    mission_ids = {
+        mission.sn: mission.id
+        for mission in to_create + to_update
+    }
+    existing = {
+        (prompt.mission_id, prompt.sn): prompt
+        for prompt in models.Prompt.objects.using(database).filter(
+            mission_id__in=mission_ids.values(),
+        )
+    }
+    to_create = []
+    to_update = []
+    for data in missions:
+        mission_id = mission_ids[data['sn']]
+        for prompt_data in data.get('prompts', []):
+            prompt = existing.get((mission_id, prompt_data['sn']))
+            if prompt is None:
+                prompt = models.Prompt(
+                    mission_id=mission_id,
+                    sn=prompt_data['sn'],
+                )
+                to_create.append(prompt)
+            else:
+                to_update.append(prompt)
+            prompt.text = prompt_data['text']
+    models.Prompt.objects.using(database).bulk_create(to_create)
+    models.Prompt.objects.using(database).bulk_update(to_update, ['text'])
+
+
+def _find_cross(definition: t.Dict[str, t.Any]) -> t.Optional[models.Cross]:
+    if 'id' in definition:
+        return models.Cross.objects.using(
+            sharding.get_cross_db(definition['id']),
+        ).filter(
+            id=definition['id'],
+        ).first()
+    for database in sharding.get_shards():
+        cross = models.Cross.objects.using(database).filter(
+            name=definition['name'],
+        ).first()
+        if cross is not None:
+            return cross
+    return None
+
+
+@transaction.atomic
+def import_cross(definition: t.Dict[str, t.Any]) -> models.Cross:
+    """Create or update cross with its missions, prompts and teams.
+
+    Cross is matched by `id` if given, by `name` otherwise.
+    """
+    fields = {
+        field: definition[field]
+        for field in (
+            'name',
+            'begins_at',
+            'ends_at',
+            'prompt_penalty',
+            'wrong_answer_penalty',
+        )
+        if field in definition
+    }
+    cross = _find_cross(definition)
+    if cross is None:
+        cross = models.Cross(id=definition.get('id') or uuid.uuid4())
+        database = sharding.place_cross(cross.id)
+    else:
+        database = cross._state.db
+    for field, value in fields.items():
+        setattr(cross, field, value)
+    with transaction.atomic(using=database):
+        cross.save(using=database)
+        _import_teams(cross, definition.get('teams', []))
+        _import_missions(cross, definition.get('missions', []))
+    transaction.on_commit(lambda: cache.invalidate(
+        cross.id,
+        'catalog',
+        *cache.LEADERBOARD_ENTITIES,
+    ))
+    return cross
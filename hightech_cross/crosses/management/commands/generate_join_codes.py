@@ -0,0 +1,45 @@
+"""Management command to generate team join codes for a cross."""
+from django.core.exceptions import ValidationError
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from ... import (
+    models,
+    sharding,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Generate one-time join codes for teams of a cross '
+        'in its shard database and list unused ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cross_id', help='Cross UUID.')
+
+    def handle(self, cross_id: str, *args, **options):
+        try:
+            cross = models.Cross.objects.using(
+                sharding.get_cross_db(cross_id),
+            ).filter(
+                id=cross_id,
+            ).first()
+        except ValidationError as error:
+            raise CommandError(error)
+        if cross is None:
+            raise CommandError(f'Cross {cross_id} not found.')
+        join_codes = models.JoinCode.generate(cross)
+        for join_code in cross.join_codes.filter(
+            used_at=None,
+        ).select_related(
+            'user',
+        ).order_by(
+            'user__username',
+        ):
+            self.stdout.write(f'{join_code.user.username}: {join_code.code}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {len(join_codes)} join codes.',
+        ))
@@ -0,0 +1,31 @@
+"""Management command to import cross definition from file."""
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from rest_framework import serializers
+
+from ...importer import (
+    import_cross,
+    load_definition,
+)
+
+
+class Command(BaseCommand):
+    help = 'Import cross with missions, prompts and teams from YAML or JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Cross definition file path.')
+
+    def handle(self, path: str, *args, **options):
+        try:
+            with open(path, 'rb') as stream:
+                definition = load_definition(stream)
+        except OSError as error:
+            raise CommandError(error)
+        except serializers.ValidationError as error:
+            raise CommandError(error.detail)
+        cross = import_cross(definition)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported cross "{cross.name}" ({cross.id}).',
+        ))
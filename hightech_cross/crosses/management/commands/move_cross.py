@@ -0,0 +1,48 @@
+"""Management command to move cross to another shard database."""
+from django.core.exceptions import ValidationError
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+
+from ... import (
+    cache,
+    models,
+    sharding,
+)
+
+
+class Command(BaseCommand):
+    help = 'Move cross with all its data to another shard database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('cross_id', help='Cross UUID.')
+        parser.add_argument(
+            'database',
+            help='Target database alias from CROSSES_SHARDS setting.',
+        )
+
+    def handle(self, cross_id: str, database: str, *args, **options):
+        if database not in sharding.get_shards():
+            raise CommandError(f'Unknown shard {database}.')
+        source = sharding.get_cross_db(cross_id)
+        try:
+            cross = models.Cross.objects.using(source).filter(
+                id=cross_id,
+            ).first()
+        except ValidationError as error:
+            raise CommandError(error)
+        if cross is None:
+            raise CommandError(f'Cross {cross_id} not found.')
+        if source == database:
+            raise CommandError(f'Cross {cross_id} is already in {database}.')
+        sharding.move_cross(cross, database)
+        cache.invalidate(
+            cross.id,
+            'cross',
+            'catalog',
+            *cache.LEADERBOARD_ENTITIES,
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Moved cross {cross.id} from {source} to {database}.',
+        ))
@@ -0,0 +1,16 @@
+"""Management command to roll up new progress logs for analytics."""
+from django.core.management.base import BaseCommand
+
+from ...analytics import refresh_rollups
+from ...sharding import get_shards
+
+
+class Command(BaseCommand):
+    help = 'Roll up progress logs created since last refresh.'
+
+    def handle(self, *args, **options):
+        buckets = sum(
+            refresh_rollups(using=database)
+            for database in get_shards()
+        )
+        self.stdout.write(self.style.SUCCESS(f'Updated {buckets} buckets.'))
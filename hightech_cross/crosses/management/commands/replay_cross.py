@@ -0,0 +1,103 @@
+"""Management command to recompute cross standings from progress logs."""
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import (
+    BaseCommand,
+    CommandError,
+)
+from django.db import transaction
+from django.utils.dateparse import parse_duration
+
+from ... import (
+    cache,
+    models,
+    sharding,
+)
+from ...replay import Replay
+
+BATCH_SIZE = 1000
+
+
+def duration(value: str) -> timedelta:
+    """Parse duration argument like `00:15:00`."""
+    result = parse_duration(value)
+    if result is None:
+        raise ValueError(value)
+    return result
+
+
+class Command(BaseCommand):
+    help = (
+        'Replay cross progress logs with stored or given penalty rules, '
+        'show standings and penalty diffs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('cross_id', help='Cross UUID.')
+        parser.add_argument(
+            '--prompt-penalty',
+            type=duration,
+            help='Penalty for using prompts in all missions, like 00:15:00.',
+        )
+        parser.add_argument(
+            '--wrong-answer-penalty',
+            type=duration,
+            help='Penalty for wrong answers in all missions, like 00:30:00.',
+        )
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Store replayed penalties instead of dry run.',
+        )
+
+    def handle(self, cross_id: str, *args, **options):
+        try:
+            cross = models.Cross.objects.using(
+                sharding.get_cross_db(cross_id),
+            ).filter(
+                id=cross_id,
+            ).first()
+        except ValidationError as error:
+            raise CommandError(error)
+        if cross is None:
+            raise CommandError(f'Cross {cross_id} not found.')
+        overrides = {
+            name: options[name]
+            for name in models.ScoringRules._fields
+            if options[name] is not None
+        }
+        replay = Replay(cross, overrides)
+        logs = models.ProgressLog.objects.using(cross._state.db)
+        diffs = 0
+        with transaction.atomic(using=cross._state.db):
+            to_update = []
+            for diff in replay:
+                diffs += 1
+                self.stdout.write(
+                    f'{diff.log_id}: {diff.stored} -> {diff.replayed}',
+                )
+                if options['apply']:
+                    to_update.append(models.ProgressLog(
+                        id=diff.log_id,
+                        penalty=diff.replayed,
+                    ))
+                if len(to_update) >= BATCH_SIZE:
+                    logs.bulk_update(to_update, ['penalty'])
+                    to_update = []
+            logs.bulk_update(to_update, ['penalty'])
+            if options['apply'] and diffs:
+                cache.invalidate(
+                    cross.id,
+                    *cache.LEADERBOARD_ENTITIES,
+                    using=cross._state.db,
+                )
+        for team in replay.leaderboard:
+            self.stdout.write(
+                f'{team["rank"]}. {team["name"]}: '
+                f'{team["missions_finished"]} missions, {team["penalty"]}',
+            )
+        verb = 'Updated' if options['apply'] else 'Found'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {diffs} penalty diffs.',
+        ))
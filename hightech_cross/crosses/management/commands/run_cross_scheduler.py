@@ -0,0 +1,29 @@
+"""Management command to run cross lifecycle scheduler."""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from ...scheduler import CrossScheduler
+
+
+class Command(BaseCommand):
+    help = 'Warm up caches before cross start and freeze standings at end.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=getattr(settings, 'CROSSES_SCHEDULER_INTERVAL', 30),
+            help='Seconds between checks.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Run pending hooks once and exit.',
+        )
+
+    def handle(self, *args, **options):
+        scheduler = CrossScheduler()
+        if options['once']:
+            scheduler.run_pending()
+        else:
+            scheduler.run_forever(options['interval'])
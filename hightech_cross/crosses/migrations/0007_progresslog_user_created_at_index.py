@@ -0,0 +1,17 @@
+# Generated by Django 3.1.12 on 2026-10-19 14:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crosses', '0006_auto_20200511_0934'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progresslog',
+            index=models.Index(fields=['user', 'created_at'], name='crosses_pro_user_id_92dfbf_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 3.1.12 on 2026-10-19 14:36
+
+import datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crosses', '0007_progresslog_user_created_at_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cross',
+            name='prompt_penalty',
+            field=models.DurationField(default=datetime.timedelta(seconds=900)),
+        ),
+        migrations.AddField(
+            model_name='cross',
+            name='wrong_answer_penalty',
+            field=models.DurationField(default=datetime.timedelta(seconds=1800)),
+        ),
+        migrations.AddField(
+            model_name='mission',
+            name='prompt_penalty',
+            field=models.DurationField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='mission',
+            name='wrong_answer_penalty',
+            field=models.DurationField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.1.12 on 2026-10-19 14:36
+
+import crosses.models
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('crosses', '0008_penalty_rules'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JoinCode',
+            fields=[
+                ('code', models.CharField(default=crosses.models.generate_join_code, max_length=32, primary_key=True, serialize=False)),
+                ('used_at', models.DateTimeField(blank=True, null=True)),
+                ('cross', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='join_codes', to='crosses.cross')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='join_codes', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
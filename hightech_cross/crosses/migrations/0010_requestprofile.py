@@ -0,0 +1,29 @@
+# Generated by Django 3.1.12 on 2026-10-19 14:42
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crosses', '0009_joincode'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('method', models.CharField(max_length=7)),
+                ('path', models.CharField(max_length=255)),
+                ('view', models.CharField(max_length=63)),
+                ('duration', models.DurationField()),
+                ('stats', models.BinaryField()),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 3.1.12 on 2026-10-19 14:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crosses', '0010_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupState',
+            fields=[
+                ('name', models.CharField(max_length=63, primary_key=True, serialize=False)),
+                ('high_water_mark', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MissionStats',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('minute', models.DateTimeField()),
+                ('prompts_taken', models.IntegerField(default=0)),
+                ('wrong_answers', models.IntegerField(default=0)),
+                ('right_answers', models.IntegerField(default=0)),
+                ('cross', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='mission_stats', to='crosses.cross')),
+                ('mission', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='crosses.mission')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='missionstats',
+            index=models.Index(fields=['cross', 'minute'], name='crosses_mis_cross_i_6aac18_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='missionstats',
+            unique_together={('mission', 'minute')},
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 3.1.12 on 2026-10-19 14:48
+
+from django.conf import settings
+from django.db import migrations, models, router
+import django.db.models.deletion
+
+
+def fill_user_directory(apps, schema_editor):
+    UserCross = apps.get_model('crosses', 'UserCross')
+    Cross = apps.get_model('crosses', 'Cross')
+    database = schema_editor.connection.alias
+    if not router.allow_migrate_model(database, UserCross):
+        return
+    UserCross.objects.using(database).bulk_create([
+        UserCross(
+            user_id=entry.user_id,
+            cross_id=entry.cross_id,
+            begins_at=entry.cross.begins_at,
+        )
+        for entry in Cross.users.through.objects.using(
+            database,
+        ).select_related(
+            'cross',
+        )
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('crosses', '0011_mission_stats_rollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CrossLocation',
+            fields=[
+                ('cross_id', models.UUIDField(primary_key=True, serialize=False)),
+                ('database', models.CharField(max_length=63)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserCross',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cross_id', models.UUIDField(db_index=True)),
+                ('begins_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cross_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'unique_together': {('user', 'cross_id')},
+            },
+        ),
+        migrations.RunPython(fill_user_directory, migrations.RunPython.noop),
+    ]
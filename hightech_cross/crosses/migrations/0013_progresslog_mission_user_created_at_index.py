@@ -0,0 +1,17 @@
+# Generated by Django 3.1.12 on 2026-10-19 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('crosses', '0012_shard_directory'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='progresslog',
+            index=models.Index(fields=['mission', 'user', 'created_at'], name='crosses_pro_mission_e35281_idx'),
+        ),
+    ]
@@ -1,9 +1,12 @@
 """DB models for `crosses` app.
 
 Attributes:
-    PROMPT_PENALTY (timedelta): Time penalty for using prompts.
-    WRONG_ANSWER_PENALTY (timedelta): Time penalty for sending wrong answers.
+    PROMPT_PENALTY (timedelta): Default time penalty for using prompts.
+    WRONG_ANSWER_PENALTY (timedelta): Default time penalty for sending
+        wrong answers.
+    MASK_BITS (int): Missions per SQL `bit_or` mask, fits in `bigint`.
 """
+import secrets
 import typing as t
 import uuid
 from datetime import (
@@ -13,15 +16,35 @@ from datetime import (
 from decimal import Decimal
 
 from django.contrib.auth.models import User
+from django.contrib.postgres.aggregates import BitOr
 from django.contrib.postgres.fields import JSONField
 from django.db import (
     models,
     transaction,
 )
+from django.db.models.fields.json import KeyTextTransform
 from django.utils.timezone import now
 
 PROMPT_PENALTY = timedelta(minutes=15)
 WRONG_ANSWER_PENALTY = timedelta(minutes=30)
+MASK_BITS = 63
+
+
+def generate_join_code() -> str:
+    """Generate random team join code."""
+    return secrets.token_urlsafe(12)
+
+
+class ScoringRules(t.NamedTuple):
+    """Penalty rules for a cross or a mission.
+
+    Attributes:
+        prompt_penalty (timedelta): Time penalty for using prompts.
+        wrong_answer_penalty (timedelta): Time penalty for wrong answers.
+    """
+
+    prompt_penalty: timedelta = PROMPT_PENALTY
+    wrong_answer_penalty: timedelta = WRONG_ANSWER_PENALTY
 
 
 class ProgressEvent(models.TextChoices):
@@ -32,6 +55,19 @@ class ProgressEvent(models.TextChoices):
     WRONG_ANSWER = 'WRONG_ANSWER'
 
 
+def rank_leaderboard(
+    teams: t.List[t.Dict[str, t.Any]],
+) -> t.List[t.Dict[str, t.Any]]:
+    """Sort teams by finished missions and penalty and set their ranks."""
+    teams.sort(key=lambda team: (
+        -team['missions_finished'],
+        team['penalty'],
+    ))
+    for rank, team in enumerate(teams, 1):
+        team['rank'] = rank
+    return teams
+
+
 class Cross(models.Model):
     """Tournament for several teams.
 
@@ -41,6 +77,8 @@ class Cross(models.Model):
         begins_at (datetime): Cross start time.
         ends_at (datetime): Cross end time.
         users (models.Manager): Teams participating.
+        prompt_penalty (timedelta): Time penalty for using prompts.
+        wrong_answer_penalty (timedelta): Time penalty for wrong answers.
     """
 
     id: uuid.UUID = models.UUIDField(
@@ -52,38 +90,188 @@ class Cross(models.Model):
     begins_at: datetime = models.DateTimeField()
     ends_at: datetime = models.DateTimeField()
     users: models.Manager = models.ManyToManyField('auth.User', related_name='crosses')
+    prompt_penalty: timedelta = models.DurationField(default=PROMPT_PENALTY)
+    wrong_answer_penalty: timedelta = models.DurationField(
+        default=WRONG_ANSWER_PENALTY,
+    )
+
+    @property
+    def scoring_rules(self) -> ScoringRules:
+        """Penalty rules for cross missions."""
+        return ScoringRules(
+            prompt_penalty=self.prompt_penalty,
+            wrong_answer_penalty=self.wrong_answer_penalty,
+        )
 
     @property
-    @transaction.atomic
     def leaderboard(self) -> t.List[t.Dict[str, t.Any]]:
-        """Ranked team list with stats."""
+        """Ranked team list with stats.
+
+        Logs of all teams and missions are aggregated in a single query.
+        """
+        with transaction.atomic(using=self._state.db):
+            users = list(self.users.values_list('id', 'username'))
+            missions = list(self.missions.values_list('id', 'sn'))
+            stats = {
+                (row['user_id'], row['mission_id']): row
+                for row in ProgressLog.objects.using(self._state.db).filter(
+                    mission__cross_id=self.id,
+                ).values(
+                    'user_id',
+                    'mission_id',
+                ).order_by().annotate(
+                    right_answers=models.Count(
+                        'id',
+                        filter=models.Q(event=ProgressEvent.RIGHT_ANSWER),
+                    ),
+                    total_penalty=models.Sum('penalty'),
+                )
+            }
         result = []
-        for user in self.users.all():
+        for user_id, username in users:
             mission_stati = []
             total_penalty = timedelta(0)
             missions_finished = 0
-            for mission in self.missions.all():
-                finished = mission.get_finished(user_id=user.id)
-                penalty = mission.get_penalty(user_id=user.id)
+            for mission_id, sn in missions:
+                row = stats.get((user_id, mission_id))
+                finished = bool(row and row['right_answers'])
                 mission_stati.append({
-                    'sn': mission.sn,
+                    'sn': sn,
                     'finished': finished,
                 })
-                total_penalty += penalty * finished
-                missions_finished += finished
+                if finished:
+                    total_penalty += row['total_penalty']
+                    missions_finished += 1
             result.append({
-                'name': user.username,
+                'name': username,
                 'missions': mission_stati,
                 'missions_finished': missions_finished,
                 'penalty': total_penalty,
             })
-        result.sort(key=lambda user: (
-            -user['missions_finished'],
-            user['penalty'],
-        ))
-        for rank, user in enumerate(result, 1):
-            user['rank'] = rank
-        return result
+        return rank_leaderboard(result)
+
+    @property
+    def compact_leaderboard(self) -> t.Dict[str, t.Any]:
+        """Ranked team list with missions finished as a bitset.
+
+        Bit `i` of team bitset is set if mission `missions[i]` is finished.
+        Penalties are in whole seconds.
+        All teams are aggregated in a single query.
+        """
+        mission_ids = list(self.missions.values_list('id', 'sn'))
+        chunks = [
+            mission_ids[start:start + MASK_BITS]
+            for start in range(0, len(mission_ids), MASK_BITS)
+        ]
+        logs = ProgressLog.objects.using(self._state.db)
+        finished_logs = logs.filter(
+            user_id=models.OuterRef('user_id'),
+            mission_id=models.OuterRef('mission_id'),
+            event=ProgressEvent.RIGHT_ANSWER,
+        )
+        right_answer = models.Q(event=ProgressEvent.RIGHT_ANSWER)
+        masks = {
+            f'mask_{number}': BitOr(
+                models.Case(
+                    *(
+                        models.When(mission_id=mission_id, then=1 << bit)
+                        for bit, (mission_id, _) in enumerate(chunk)
+                    ),
+                    default=0,
+                    output_field=models.BigIntegerField(),
+                ),
+                filter=right_answer,
+            )
+            for number, chunk in enumerate(chunks)
+        }
+        rows = logs.filter(
+            mission__cross_id=self.id,
+            user__crosses=self.id,
+        ).annotate(
+            mission_finished=models.Exists(finished_logs),
+        ).values(
+            'user_id',
+        ).order_by().annotate(
+            total_penalty=models.Sum(
+                'penalty',
+                filter=models.Q(mission_finished=True),
+            ),
+            **masks,
+        )
+        teams = {
+            user_id: {
+                'name': username,
+                'finished': 0,
+                'missions_finished': 0,
+                'penalty': 0,
+            }
+            for user_id, username in self.users.values_list('id', 'username')
+        }
+        for row in rows:
+            team = teams[row['user_id']]
+            for number in range(len(chunks)):
+                team['finished'] |= (
+                    row[f'mask_{number}'] or 0
+                ) << number * MASK_BITS
+            team['missions_finished'] = bin(team['finished']).count('1')
+            team['penalty'] = int(
+                (row['total_penalty'] or timedelta(0)).total_seconds(),
+            )
+        return {
+            'missions': [sn for _, sn in mission_ids],
+            'teams': rank_leaderboard(list(teams.values())),
+        }
+
+    def get_mission_stati(
+        self,
+        user_id: uuid.UUID,
+    ) -> t.Dict[int, t.Dict[str, t.Any]]:
+        """Get dynamic mission stati for user keyed by mission s/n.
+
+        All missions are aggregated in a single query,
+        answers of all missions are loaded in another one.
+        """
+        user_logs = models.Q(progress_logs__user_id=user_id)
+        missions = self.missions.annotate(
+            right_answers=models.Count(
+                'progress_logs',
+                filter=user_logs & models.Q(
+                    progress_logs__event=ProgressEvent.RIGHT_ANSWER,
+                ),
+            ),
+            total_penalty=models.Sum(
+                'progress_logs__penalty',
+                filter=user_logs,
+            ),
+        ).values_list('id', 'sn', 'right_answers', 'total_penalty')
+        answers: t.Dict[uuid.UUID, t.List[ProgressLog]] = {}
+        for answer in ProgressLog.objects.using(self._state.db).filter(
+            mission__cross_id=self.id,
+            user_id=user_id,
+            event__in=(
+                ProgressEvent.RIGHT_ANSWER,
+                ProgressEvent.WRONG_ANSWER,
+            ),
+        ).annotate(
+            text=KeyTextTransform('text', 'details'),
+        ).only(
+            'id',
+            'mission',
+            'created_at',
+            'event',
+        ).order_by(
+            'created_at',
+            'id',
+        ):
+            answers.setdefault(answer.mission_id, []).append(answer)
+        return {
+            sn: {
+                'finished': bool(right_answers),
+                'penalty': total_penalty or timedelta(0),
+                'answers': answers.get(mission_id, []),
+            }
+            for mission_id, sn, right_answers, total_penalty in missions
+        }
 
 
 class Mission(models.Model):
@@ -98,6 +286,10 @@ class Mission(models.Model):
         answer (str): The only right answer for question.
         cross (Cross): Cross the mission is part of.
         sn (int): Mission serial number inside cross.
+        prompt_penalty (timedelta): Time penalty for using prompts.
+            Cross one is used if not set.
+        wrong_answer_penalty (timedelta): Time penalty for wrong answers.
+            Cross one is used if not set.
     """
 
     id: uuid.UUID = models.UUIDField(
@@ -116,6 +308,14 @@ class Mission(models.Model):
         related_name='missions',
     )
     sn: int = models.SmallIntegerField()
+    prompt_penalty: t.Optional[timedelta] = models.DurationField(
+        null=True,
+        blank=True,
+    )
+    wrong_answer_penalty: t.Optional[timedelta] = models.DurationField(
+        null=True,
+        blank=True,
+    )
 
     class Meta:
         unique_together = [
@@ -126,11 +326,22 @@ class Mission(models.Model):
             'sn',
         ]
 
+    @property
+    def scoring_rules(self) -> ScoringRules:
+        """Penalty rules for mission with cross ones as defaults."""
+        rules = self.cross.scoring_rules
+        if self.prompt_penalty is not None:
+            rules = rules._replace(prompt_penalty=self.prompt_penalty)
+        if self.wrong_answer_penalty is not None:
+            rules = rules._replace(
+                wrong_answer_penalty=self.wrong_answer_penalty,
+            )
+        return rules
+
     def get_logs(self, user_id: uuid.UUID) -> models.QuerySet:
         """Get mission logs for given user."""
         return self.progress_logs.filter(user_id=user_id)
 
-    @transaction.atomic
     def get_prompt(
         self,
         user_id: uuid.UUID,
@@ -146,27 +357,28 @@ class Mission(models.Model):
             return None
         if not self.cross.begins_at < now() < self.cross.ends_at:
             return None
-        logs = self.get_logs(user_id)
-        prompt = self.prompts.filter(sn=sn).first()
-        if (
-            prompt is None
-            or logs.filter(
+        with transaction.atomic(using=self._state.db):
+            logs = self.get_logs(user_id)
+            prompt = self.prompts.filter(sn=sn).first()
+            if (
+                prompt is None
+                or logs.filter(
+                    event=ProgressEvent.GET_PROMPT,
+                    details__sn=sn,
+                ).exists()
+                or logs.filter(
+                    event=ProgressEvent.RIGHT_ANSWER,
+                ).exists()
+            ):
+                return prompt
+            log = ProgressLog(
+                mission=self,
+                user_id=user_id,
                 event=ProgressEvent.GET_PROMPT,
-                details__sn=sn,
-            ).exists()
-            or logs.filter(
-                event=ProgressEvent.RIGHT_ANSWER,
-            ).exists()
-        ):
-            return prompt
-        log = ProgressLog(
-            mission_id=self.id,
-            user_id=user_id,
-            event=ProgressEvent.GET_PROMPT,
-            details={'sn': sn},
-            penalty=PROMPT_PENALTY,
-        )
-        log.save()
+                details={'sn': sn},
+                penalty=self.scoring_rules.prompt_penalty,
+            )
+            log.save()
         return prompt
 
     def get_finished(self, user_id: uuid.UUID) -> bool:
@@ -181,7 +393,6 @@ class Mission(models.Model):
             models.Sum('penalty'),
         )['penalty__sum'] or timedelta(0)
 
-    @transaction.atomic
     def give_answer(
         self,
         user_id: uuid.UUID,
@@ -190,31 +401,32 @@ class Mission(models.Model):
         """Try to guess right answer by user."""
         if not self.cross.begins_at < now() < self.cross.ends_at:
             return False
-        if self.get_finished(user_id):
-            return True
-        if text == self.answer:
-            log = ProgressLog(
-                mission_id=self.id,
-                user_id=user_id,
-                event=ProgressEvent.RIGHT_ANSWER,
-                details={'text': text},
-                penalty=now() - self.cross.begins_at,
-            )
-            log.save()
-            return True
-        logs = self.get_logs(user_id)
-        if not logs.filter(
-            event=ProgressEvent.WRONG_ANSWER,
-            details__text=text,
-        ).exists():
-            log = ProgressLog(
-                mission_id=self.id,
-                user_id=user_id,
+        with transaction.atomic(using=self._state.db):
+            if self.get_finished(user_id):
+                return True
+            if text == self.answer:
+                log = ProgressLog(
+                    mission=self,
+                    user_id=user_id,
+                    event=ProgressEvent.RIGHT_ANSWER,
+                    details={'text': text},
+                    penalty=now() - self.cross.begins_at,
+                )
+                log.save()
+                return True
+            logs = self.get_logs(user_id)
+            if not logs.filter(
                 event=ProgressEvent.WRONG_ANSWER,
-                details={'text': text},
-                penalty=WRONG_ANSWER_PENALTY,
-            )
-            log.save()
+                details__text=text,
+            ).exists():
+                log = ProgressLog(
+                    mission=self,
+                    user_id=user_id,
+                    event=ProgressEvent.WRONG_ANSWER,
+                    details={'text': text},
+                    penalty=self.scoring_rules.wrong_answer_penalty,
+                )
+                log.save()
         return False
 
 
@@ -282,7 +494,9 @@ class ProgressLog(models.Model):
 
     class Meta:
         indexes = [
-            models.Index(fields=['created_at'])
+            models.Index(fields=['created_at']),
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['mission', 'user', 'created_at']),
         ]
         ordering = [
             'created_at',
@@ -291,3 +505,182 @@ class ProgressLog(models.Model):
     @property
     def is_right(self) -> bool:
         return self.event != ProgressEvent.WRONG_ANSWER
+
+
+class JoinCode(models.Model):
+    """One-time code to get API token for team without password.
+
+    Attributes:
+        code (str): Secret code, instance PK.
+        cross (Cross): Cross the code is for.
+        user (auth.User): Team joining.
+        used_at (datetime): Code redemption date.
+    """
+
+    code: str = models.CharField(
+        primary_key=True,
+        max_length=32,
+        default=generate_join_code,
+    )
+    cross: Cross = models.ForeignKey(
+        Cross,
+        on_delete=models.CASCADE,
+        related_name='join_codes',
+    )
+    user: User = models.ForeignKey(
+        'auth.User',
+        on_delete=models.CASCADE,
+        related_name='join_codes',
+    )
+    used_at: t.Optional[datetime] = models.DateTimeField(null=True, blank=True)
+
+    @classmethod
+    def generate(cls, cross: Cross) -> t.List['JoinCode']:
+        """Create code for every team of cross without unused one.
+
+        Codes are created in the database of the cross.
+        """
+        unused = set(cross.join_codes.filter(
+            used_at=None,
+        ).values_list('user_id', flat=True))
+        return cls.objects.using(cross._state.db).bulk_create([
+            cls(cross=cross, user=user)
+            for user in cross.users.all()
+            if user.id not in unused
+        ])
+
+    @classmethod
+    def redeem(
+        cls,
+        code: str,
+        using: t.Optional[str] = None,
+    ) -> t.Optional['JoinCode']:
+        """Mark code as used and return it if it was not used before."""
+        codes = cls.objects.using(using)
+        join_code = codes.filter(code=code, used_at=None).first()
+        if join_code is None:
+            return None
+        join_code.used_at = now()
+        if not codes.filter(code=code, used_at=None).update(
+            used_at=join_code.used_at,
+        ):
+            return None
+        return join_code
+
+
+class RequestProfile(models.Model):
+    """Profile of a single API request.
+
+    Attributes:
+        id (uuid.UUID): Instance PK.
+        created_at (datetime): Profiling date.
+        method (str): HTTP method.
+        path (str): Request path.
+        view (str): View class name.
+        duration (timedelta): Request handling time.
+        stats (bytes): Marshalled `cProfile` stats, same as `.pstats` file.
+    """
+
+    id: uuid.UUID = models.UUIDField(
+        primary_key=True,
+        default=uuid.uuid4,
+        editable=False,
+    )
+    created_at: datetime = models.DateTimeField(auto_now_add=True)
+    method: str = models.CharField(max_length=7)
+    path: str = models.CharField(max_length=255)
+    view: str = models.CharField(max_length=63)
+    duration: timedelta = models.DurationField()
+    stats: bytes = models.BinaryField()
+
+    class Meta:
+        ordering = [
+            '-created_at',
+        ]
+
+
+class MissionStats(models.Model):
+    """Per-minute rollup of mission progress logs for analytics.
+
+    Attributes:
+        id (int): Instance PK.
+        cross (Cross): Cross the mission is part of.
+        mission (Mission): Mission the stats are for.
+        minute (datetime): Bucket start.
+        prompts_taken (int): Prompts taken during the minute.
+        wrong_answers (int): Wrong answers given during the minute.
+        right_answers (int): Right answers given during the minute.
+    """
+
+    cross: Cross = models.ForeignKey(
+        Cross,
+        on_delete=models.CASCADE,
+        related_name='mission_stats',
+    )
+    mission: Mission = models.ForeignKey(
+        Mission,
+        on_delete=models.CASCADE,
+        related_name='stats',
+    )
+    minute: datetime = models.DateTimeField()
+    prompts_taken: int = models.IntegerField(default=0)
+    wrong_answers: int = models.IntegerField(default=0)
+    right_answers: int = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = [
+            ('mission', 'minute'),
+        ]
+        indexes = [
+            models.Index(fields=['cross', 'minute']),
+        ]
+
+
+class RollupState(models.Model):
+    """Rollup progress.
+
+    Attributes:
+        name (str): Rollup name, instance PK.
+        high_water_mark (datetime): Logs created before it are rolled up.
+    """
+
+    name: str = models.CharField(primary_key=True, max_length=63)
+    high_water_mark: datetime = models.DateTimeField()
+
+
+class CrossLocation(models.Model):
+    """Directory entry of cross living outside the default database.
+
+    Attributes:
+        cross_id (uuid.UUID): Cross ID, instance PK.
+        database (str): Shard database alias.
+    """
+
+    cross_id: uuid.UUID = models.UUIDField(primary_key=True)
+    database: str = models.CharField(max_length=63)
+
+
+class UserCross(models.Model):
+    """Directory entry of team participating in a cross.
+
+    Mirrors `Cross.users` of all shards in the default database.
+
+    Attributes:
+        id (int): Instance PK.
+        user (auth.User): Team participating.
+        cross_id (uuid.UUID): Cross ID.
+        begins_at (datetime): Cross start time.
+    """
+
+    user: User = models.ForeignKey(
+        'auth.User',
+        on_delete=models.CASCADE,
+        related_name='cross_entries',
+    )
+    cross_id: uuid.UUID = models.UUIDField(db_index=True)
+    begins_at: datetime = models.DateTimeField()
+
+    class Meta:
+        unique_together = [
+            ('user', 'cross_id'),
+        ]
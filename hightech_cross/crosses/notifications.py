@@ -0,0 +1,163 @@
+"""Cross-process cache invalidation via Postgres LISTEN/NOTIFY.
+
+Every process dropping cache entries publishes their keys,
+listener thread of every process drops them from its local cache.
+Own notifications are handled too: they drop entries cached
+by concurrent requests from data read before the change was committed.
+Notifications sent inside a transaction are delivered on commit only.
+
+Attributes:
+    CHANNEL (str): Postgres notification channel.
+    MAX_PAYLOAD (int): Max payload length, Postgres limit is 8000 bytes.
+    ORIGIN (str): Current process ID, tells notification senders apart.
+    UNLISTENED_TIMEOUT (int): Cache entry lifetime in seconds
+        while listener is not running, overridden by
+        `CROSSES_UNLISTENED_CACHE_TIMEOUT` setting.
+"""
+import itertools
+import json
+import logging
+import os
+import select
+import socket
+import threading
+import time
+import typing as t
+
+import psycopg2
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'crosses_invalidate'
+MAX_PAYLOAD = 7000
+ORIGIN = f'{socket.gethostname()}:{os.getpid()}'
+UNLISTENED_TIMEOUT = 5
+
+_versions = itertools.count(1)
+_listening = threading.Event()
+_dropped_at: t.Dict[str, float] = {}
+
+
+def _payloads(keys: t.List[str]) -> t.Iterator[str]:
+    chunk: t.List[str] = []
+    for key in keys:
+        if chunk and len(json.dumps(chunk + [key])) > MAX_PAYLOAD:
+            yield json.dumps({
+                'origin': ORIGIN,
+                'version': next(_versions),
+                'keys': chunk,
+            })
+            chunk = []
+        chunk.append(key)
+    if chunk:
+        yield json.dumps({
+            'origin': ORIGIN,
+            'version': next(_versions),
+            'keys': chunk,
+        })
+
+
+def drop(keys: t.List[str]) -> None:
+    """Drop cache keys from local cache, remembering when."""
+    moment = time.time()
+    cache.delete_many(keys)
+    for key in keys:
+        _dropped_at[key] = moment
+
+
+def get_dropped_at(key: str) -> float:
+    """Get time cache key was last dropped by this process, 0 if never."""
+    return _dropped_at.get(key, 0.0)
+
+
+def publish(keys: t.Iterable[str]) -> None:
+    """Tell other processes to drop cache keys."""
+    if (
+        not getattr(settings, 'CROSSES_CACHE_NOTIFY', False)
+        or connection.vendor != 'postgresql'
+    ):
+        return
+    with connection.cursor() as cursor:
+        for payload in _payloads(list(keys)):
+            cursor.execute('SELECT pg_notify(%s, %s)', [CHANNEL, payload])
+
+
+def handle(payload: str) -> None:
+    """Drop cache keys from notification payload."""
+    try:
+        message = json.loads(payload)
+    except ValueError:
+        logger.warning('Invalid cache notification: %s', payload)
+        return
+    drop(message.get('keys', []))
+
+
+def is_listening() -> bool:
+    """Learn if this process receives notifications right now."""
+    return _listening.is_set()
+
+
+def get_cache_timeout(timeout: t.Optional[int]) -> t.Optional[int]:
+    """Get lifetime of new cache entry in seconds.
+
+    Entries dropped by notifications keep `timeout` only while
+    this process listens to them, short lifetime is used otherwise.
+    """
+    if is_listening():
+        return timeout
+    return getattr(
+        settings,
+        'CROSSES_UNLISTENED_CACHE_TIMEOUT',
+        UNLISTENED_TIMEOUT,
+    )
+
+
+def listen(stop: t.Optional[threading.Event] = None) -> None:
+    """Receive notifications until stopped, reconnecting on errors.
+
+    Local cache is cleared on connection loss and after reconnect,
+    as notifications might have been missed.
+    """
+    if stop is None:
+        stop = threading.Event()
+    while not stop.is_set():
+        try:
+            listener = psycopg2.connect(**connection.get_connection_params())
+        except psycopg2.Error:
+            logger.exception('Cache listener connection failed')
+            stop.wait(5)
+            continue
+        try:
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            cache.clear()
+            _listening.set()
+            while not stop.is_set():
+                if select.select([listener], [], [], 5) == ([], [], []):
+                    continue
+                listener.poll()
+                while listener.notifies:
+                    handle(listener.notifies.pop(0).payload)
+        except psycopg2.Error:
+            logger.exception('Cache listener failed')
+            _listening.clear()
+            cache.clear()
+            stop.wait(1)
+        finally:
+            _listening.clear()
+            listener.close()
+
+
+def start_listener_thread() -> threading.Thread:
+    """Run cache notification listener in a daemon thread."""
+    thread = threading.Thread(
+        target=listen,
+        name='crosses-cache-listener',
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,132 @@
+"""On-demand profiling of API requests.
+
+Request is profiled with `cProfile` if staff user sends `X-Profile` header
+or if it is randomly sampled with `CROSSES_PROFILE_SAMPLE_RATE` probability.
+Profiles are stored as `RequestProfile` and browsable in admin.
+
+Attributes:
+    PROFILE_HEADER (str): Request header asking for profiling.
+    PROFILE_ID_HEADER (str): Response header with stored profile ID.
+"""
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import tempfile
+import time
+import typing as t
+from datetime import timedelta
+
+from django.conf import settings
+from django.http import HttpRequest
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from . import models
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+PROFILE_ID_HEADER = 'X-Profile-Id'
+
+
+def load_stats(
+    profile: models.RequestProfile,
+    stream: t.Optional[t.TextIO] = None,
+) -> pstats.Stats:
+    """Load stored profile stats."""
+    with tempfile.NamedTemporaryFile(suffix='.pstats') as stats_file:
+        stats_file.write(profile.stats)
+        stats_file.flush()
+        return pstats.Stats(stats_file.name, stream=stream)
+
+
+def get_report(profile: models.RequestProfile, limit: int = 50) -> str:
+    """Get text report of most time consuming calls."""
+    stream = io.StringIO()
+    load_stats(profile, stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+def should_profile(request: HttpRequest) -> bool:
+    """Learn if request is selected for profiling."""
+    if request.META.get(PROFILE_HEADER):
+        return request.user.is_staff
+    rate = getattr(settings, 'CROSSES_PROFILE_SAMPLE_RATE', 0)
+    return rate > 0 and random.random() < rate
+
+
+class RequestProfiler:
+    """Profiler of a single request, started on creation.
+
+    Profiler covers only the thread it was started in.
+
+    Attributes:
+        profiler (cProfile.Profile): Stats collector.
+        started (float): Start time by `time.perf_counter`.
+        duration (float): Profiling time in seconds, `None` until stopped.
+    """
+
+    def __init__(self):
+        self.duration: t.Optional[float] = None
+        self.started = time.perf_counter()
+        self.profiler = cProfile.Profile()
+        self.profiler.enable()
+
+    def stop(self) -> None:
+        """Stop collecting stats."""
+        if self.duration is None:
+            self.profiler.disable()
+            self.duration = time.perf_counter() - self.started
+
+    def save(self, request: HttpRequest, view: str) -> models.RequestProfile:
+        """Stop profiler and store its stats."""
+        self.stop()
+        self.profiler.create_stats()
+        return models.RequestProfile.objects.create(
+            method=request.method,
+            path=request.path[:255],
+            view=view,
+            duration=timedelta(seconds=self.duration),
+            stats=marshal.dumps(self.profiler.stats),
+        )
+
+
+class ProfilingMixin:
+    """Viewset mixin to profile selected requests.
+
+    Profiler covers the handler with serialization and model methods.
+    Unselected requests pay only for a header lookup and a random draw.
+    """
+
+    _profiler = None
+
+    def should_profile(self, request: Request) -> bool:
+        """Learn if request is selected for profiling."""
+        return should_profile(request)
+
+    def initial(self, request: Request, *args, **kwargs) -> None:
+        super().initial(request, *args, **kwargs)
+        if self.should_profile(request):
+            self._profiler = RequestProfiler()
+
+    def finalize_response(
+        self,
+        request: Request,
+        response: Response,
+        *args,
+        **kwargs,
+    ) -> Response:
+        response = super().finalize_response(
+            request,
+            response,
+            *args,
+            **kwargs,
+        )
+        if self._profiler is None:
+            return response
+        if isinstance(response, Response):
+            response.render()
+        profile = self._profiler.save(request, type(self).__name__)
+        self._profiler = None
+        response[PROFILE_ID_HEADER] = str(profile.id)
+        return response
@@ -0,0 +1,151 @@
+"""Event-sourced replay of cross progress logs.
+
+Logs are streamed in creation order through a pure scoring function,
+so standings and penalties can be recomputed under any rules
+and compared to the stored ones.
+
+Attributes:
+    CLOCK_TOLERANCE (timedelta): Max difference between stored and replayed
+        penalties treated as equal. Right answer penalty is stored with
+        a time taken slightly before log creation.
+"""
+import typing as t
+import uuid
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from . import models
+
+CLOCK_TOLERANCE = timedelta(seconds=1)
+
+
+class PenaltyDiff(t.NamedTuple):
+    """Log which penalty differs from the replayed one."""
+
+    log_id: uuid.UUID
+    stored: timedelta
+    replayed: timedelta
+
+
+def score_event(
+    rules: models.ScoringRules,
+    event: str,
+    created_at: datetime,
+    begins_at: datetime,
+) -> timedelta:
+    """Get time penalty for a single progress event."""
+    if event == models.ProgressEvent.GET_PROMPT:
+        return rules.prompt_penalty
+    if event == models.ProgressEvent.WRONG_ANSWER:
+        return rules.wrong_answer_penalty
+    return created_at - begins_at
+
+
+class Replay:
+    """Recomputation of cross standings and penalties from its logs.
+
+    Iterating it yields logs with penalties differing from stored ones,
+    standings are ready in `leaderboard` once iteration is over.
+    Logs are iterated with a DB cursor and diffs are not kept,
+    so memory use depends only on numbers of teams and missions.
+
+    Attributes:
+        cross (models.Cross): Cross replayed.
+        overrides (t.Dict[str, timedelta]): `ScoringRules` fields
+            replacing stored mission rules for all missions.
+        leaderboard (t.Optional[list]): Ranked team list
+            like `Cross.leaderboard`, `None` until logs are replayed.
+    """
+
+    def __init__(
+        self,
+        cross: models.Cross,
+        overrides: t.Optional[t.Dict[str, timedelta]] = None,
+    ):
+        self.cross = cross
+        self.overrides = overrides or {}
+        self.leaderboard: t.Optional[t.List[t.Dict[str, t.Any]]] = None
+
+    def __iter__(self) -> t.Iterator[PenaltyDiff]:
+        cross = self.cross
+        missions = cross.missions.all()
+        mission_sns = {mission.id: mission.sn for mission in missions}
+        mission_rules = {}
+        for mission in missions:
+            mission.cross = cross
+            mission_rules[mission.id] = mission.scoring_rules._replace(
+                **self.overrides,
+            )
+        teams = {
+            user_id: {
+                'name': username,
+                'missions': {
+                    sn: {'finished': False, 'penalty': timedelta(0)}
+                    for sn in sorted(mission_sns.values())
+                },
+            }
+            for user_id, username in cross.users.values_list(
+                'id',
+                'username',
+            )
+        }
+        logs = models.ProgressLog.objects.using(cross._state.db).filter(
+            mission__cross_id=cross.id,
+        ).order_by(
+            'created_at',
+            'id',
+        ).values_list(
+            'id',
+            'mission_id',
+            'user_id',
+            'created_at',
+            'event',
+            'penalty',
+        )
+        for log_id, mission_id, user_id, created_at, event, stored in (
+            logs.iterator()
+        ):
+            penalty = score_event(
+                mission_rules[mission_id],
+                event,
+                created_at,
+                cross.begins_at,
+            )
+            if abs(penalty - stored) <= CLOCK_TOLERANCE:
+                penalty = stored
+            else:
+                yield PenaltyDiff(log_id, stored, penalty)
+            team = teams.get(user_id)
+            if team is None:
+                continue
+            mission = team['missions'][mission_sns[mission_id]]
+            if mission['finished']:
+                continue
+            mission['penalty'] += penalty
+            mission['finished'] = event == models.ProgressEvent.RIGHT_ANSWER
+        self.leaderboard = models.rank_leaderboard([
+            _make_leader(team)
+            for team in teams.values()
+        ])
+
+
+def _make_leader(team: t.Dict[str, t.Any]) -> t.Dict[str, t.Any]:
+    finished = [
+        mission
+        for mission in team['missions'].values()
+        if mission['finished']
+    ]
+    return {
+        'name': team['name'],
+        'missions': [
+            {'sn': sn, 'finished': mission['finished']}
+            for sn, mission in team['missions'].items()
+        ],
+        'missions_finished': len(finished),
+        'penalty': sum(
+            (mission['penalty'] for mission in finished),
+            timedelta(0),
+        ),
+    }
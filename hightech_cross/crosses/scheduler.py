@@ -0,0 +1,122 @@
+"""Cross lifecycle scheduler.
+
+Runs hooks for every cross once around its start and end:
+caches are warmed up a bit before `begins_at`,
+final standings are frozen at `ends_at`.
+Mission analytics rollups are refreshed on every check.
+"""
+import logging
+import threading
+import typing as t
+import uuid
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.timezone import now
+
+from . import (
+    cache,
+    models,
+    sharding,
+)
+from .analytics import (
+    ROLLUP_LAG,
+    refresh_rollups,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class CrossScheduler:
+    """Lifecycle hook runner.
+
+    Attributes:
+        clock (t.Callable[[], datetime]): Current time source.
+        warm_up_before (timedelta): How long before start to warm up.
+        done (t.Set[t.Tuple[uuid.UUID, str]]): Hooks already run.
+    """
+
+    def __init__(
+        self,
+        clock: t.Callable[[], datetime] = now,
+        warm_up_before: t.Optional[timedelta] = None,
+    ):
+        self.clock = clock
+        if warm_up_before is None:
+            warm_up_before = timedelta(
+                seconds=getattr(settings, 'CROSSES_WARM_UP_BEFORE', 300),
+            )
+        self.warm_up_before = warm_up_before
+        self.done: t.Set[t.Tuple[uuid.UUID, str]] = set()
+
+    def warm_up(self, cross: models.Cross) -> None:
+        """Hook run shortly before cross start."""
+        cache.warm_up(cross)
+
+    def finalize(self, cross: models.Cross) -> None:
+        """Hook run after cross end."""
+        cache.finalize(cross)
+
+    def _run_once(
+        self,
+        cross: models.Cross,
+        hook: t.Callable[[models.Cross], None],
+    ) -> None:
+        if (cross.id, hook.__name__) in self.done:
+            return
+        logger.info('Running %s for cross %s', hook.__name__, cross.id)
+        hook(cross)
+        self.done.add((cross.id, hook.__name__))
+
+    def run_pending(self) -> None:
+        """Run hooks due by now."""
+        moment = self.clock()
+        for database in sharding.get_shards():
+            crosses = models.Cross.objects.using(database)
+            for cross in crosses.filter(
+                begins_at__lte=moment + self.warm_up_before,
+                ends_at__gt=moment,
+            ):
+                self._run_once(cross, self.warm_up)
+            for cross in crosses.filter(
+                ends_at__lte=moment,
+                ends_at__gt=moment - self.warm_up_before,
+            ):
+                self._run_once(cross, self.finalize)
+            refresh_rollups(moment - ROLLUP_LAG, using=database)
+
+    def run_forever(
+        self,
+        interval: float,
+        stop: t.Optional[threading.Event] = None,
+    ) -> None:
+        """Run pending hooks every `interval` seconds until stopped."""
+        if stop is None:
+            stop = threading.Event()
+        while not stop.is_set():
+            close_old_connections()
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception('Cross scheduler iteration failed')
+            stop.wait(interval)
+
+
+def start_scheduler_thread() -> threading.Thread:
+    """Run scheduler in a daemon thread of current process.
+
+    In-process caches of the worker get warmed up this way.
+    """
+    scheduler = CrossScheduler()
+    thread = threading.Thread(
+        target=scheduler.run_forever,
+        args=(getattr(settings, 'CROSSES_SCHEDULER_INTERVAL', 30),),
+        name='crosses-scheduler',
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -1,22 +1,87 @@
 """Serializers and helpers for `crosses` app views."""
+import base64
+import binascii
+import math
+import typing as t
+import uuid
+from datetime import (
+    datetime,
+    timedelta,
+)
 from decimal import Decimal
+from functools import lru_cache
 
 from django.db.models import QuerySet
+from django.utils.dateparse import parse_datetime
 from django.utils.duration import duration_string
 from rest_framework import serializers
 
 from . import models
 
 
+@lru_cache(maxsize=4096)
+def format_coordinate(value: Decimal) -> str:
+    """Format `value` like `15°16'17"`.
+
+    Mission coordinates hardly ever change, so rendered values are memoized.
+    """
+    degrees = int(value)
+    minutes = (value % 1) * 60
+    seconds = (minutes % 1) * 60
+    return f'{degrees}\xb0{int(minutes)}\'{int(seconds)}"'
+
+
 class CoordinateField(serializers.Field):
     """Field for latitude or longitude."""
 
     def to_representation(self, value: Decimal) -> str:
         """Format `value` like `15°16'17"`."""
-        degrees = int(value)
-        minutes = (value % 1) * 60
-        seconds = (minutes % 1) * 60
-        return f'{degrees}\xb0{int(minutes)}\'{int(seconds)}"'
+        return format_coordinate(value)
+
+
+class SyncCursor(t.NamedTuple):
+    """Progress sync position.
+
+    Attributes:
+        watermark (datetime): Logs created before it are synced.
+        seen (t.Dict[uuid.UUID, datetime]): Creation dates of logs
+            created since `watermark` and synced already, by log ID.
+    """
+
+    watermark: datetime
+    seen: t.Dict[uuid.UUID, datetime]
+
+
+def encode_cursor(cursor: SyncCursor) -> str:
+    """Make opaque sync cursor."""
+    parts = [cursor.watermark.isoformat()]
+    for log_id, created_at in cursor.seen.items():
+        offset = (created_at - cursor.watermark) // timedelta(microseconds=1)
+        parts.append(f'{offset}:{log_id.hex}')
+    raw = '|'.join(parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> SyncCursor:
+    """Get sync position from opaque cursor.
+
+    Cursors made of last synced log creation date and ID are accepted too.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        watermark, *parts = raw.split('|')
+        watermark = parse_datetime(watermark)
+        seen = {}
+        for part in parts:
+            offset, _, log_id = part.rpartition(':')
+            seen[uuid.UUID(log_id)] = watermark + timedelta(
+                microseconds=int(offset or 0),
+            )
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        watermark = None
+    if watermark is None:
+        raise serializers.ValidationError({'since': 'Invalid cursor.'})
+    return SyncCursor(watermark, seen)
 
 
 class AnswerListSerializer(serializers.ListSerializer):
@@ -43,7 +108,42 @@ class AnswerSerializer(serializers.ModelSerializer):
         ]
 
 
+class AnswerPageSerializer(serializers.ModelSerializer):
+    """Answer with text annotated by query instead of loaded `details`."""
+
+    text = serializers.CharField()
+
+    class Meta:
+        model = models.ProgressLog
+        fields = [
+            'created_at',
+            'is_right',
+            'text',
+        ]
+
+
+class ProgressLogSerializer(serializers.ModelSerializer):
+    mission = serializers.IntegerField(source='mission.sn')
+
+    class Meta:
+        model = models.ProgressLog
+        fields = [
+            'created_at',
+            'mission',
+            'event',
+            'details',
+            'penalty',
+        ]
+
+
 class PromptSerializer(serializers.ModelSerializer):
+    """Prompt with text shown only if user (team) has taken it.
+
+    Prompts taken by user in the cross are loaded once per serializer
+    context, so rendering prompts of any number of missions costs
+    a single query.
+    """
+
     class Meta:
         model = models.Prompt
         fields = [
@@ -55,13 +155,32 @@ class PromptSerializer(serializers.ModelSerializer):
             'text',
         ]
 
+    def get_taken(
+        self,
+        instance: models.Prompt,
+    ) -> t.Set[t.Tuple[uuid.UUID, int]]:
+        """Get mission IDs and s/n of prompts taken by user in the cross."""
+        if 'taken_prompts' not in self.context:
+            self.context['taken_prompts'] = {
+                (mission_id, int(sn))
+                for mission_id, sn in models.ProgressLog.objects.using(
+                    instance._state.db,
+                ).filter(
+                    mission__cross_id=instance.mission.cross_id,
+                    user_id=self.context['request'].user.id,
+                    event=models.ProgressEvent.GET_PROMPT,
+                ).values_list(
+                    'mission_id',
+                    'details__sn',
+                )
+                if sn is not None
+            }
+        return self.context['taken_prompts']
+
     def to_representation(self, instance: models.Prompt) -> dict:
         representation = super().to_representation(instance)
-        if not models.ProgressLog.objects.filter(
-            user_id=self.context['request'].user.id,
-            event=models.ProgressEvent.GET_PROMPT,
-            details__sn=instance.sn,
-        ).exists():
+        taken = self.get_taken(instance)
+        if (instance.mission_id, instance.sn) not in taken:
             representation['text'] = None
         return representation
 
@@ -99,6 +218,37 @@ class MissionSerializer(serializers.ModelSerializer):
         ))
 
 
+class CatalogMissionSerializer(serializers.ModelSerializer):
+    """Static part of mission info, same for every team."""
+
+    lat = CoordinateField()
+    lon = CoordinateField()
+    prompts = serializers.SlugRelatedField(
+        many=True,
+        read_only=True,
+        slug_field='sn',
+    )
+
+    class Meta:
+        model = models.Mission
+        fields = [
+            'sn',
+            'name',
+            'description',
+            'lat',
+            'lon',
+            'prompts',
+        ]
+
+
+class MissionStatusSerializer(serializers.Serializer):
+    """Dynamic part of mission info for a single team."""
+
+    answers = AnswerPageSerializer(many=True)
+    finished = serializers.BooleanField()
+    penalty = serializers.DurationField()
+
+
 class LeaderMissionSerializer(serializers.Serializer):
     sn = serializers.IntegerField()
     finished = serializers.BooleanField()
@@ -123,3 +273,53 @@ class CrossSerializer(serializers.ModelSerializer):
             'ends_at',
             'leaderboard',
         ]
+
+
+class BitsetField(serializers.Field):
+    """Field for integer bitset, rendered as base64 of little-endian bytes."""
+
+    def to_representation(self, value: int) -> str:
+        length = math.ceil(value.bit_length() / 8)
+        return base64.b64encode(value.to_bytes(length, 'little')).decode()
+
+
+class CompactLeaderSerializer(serializers.Serializer):
+    name = serializers.CharField()
+    finished = BitsetField()
+    missions_finished = serializers.IntegerField()
+    penalty = serializers.IntegerField()
+
+
+class CompactLeaderboardSerializer(serializers.Serializer):
+    missions = serializers.ListField(child=serializers.IntegerField())
+    teams = CompactLeaderSerializer(many=True)
+
+
+class CompactCrossSerializer(serializers.ModelSerializer):
+    leaderboard = CompactLeaderboardSerializer(source='compact_leaderboard')
+
+    class Meta:
+        model = models.Cross
+        fields = [
+            'id',
+            'name',
+            'begins_at',
+            'ends_at',
+            'leaderboard',
+        ]
+
+
+class MissionAnalyticsSerializer(serializers.Serializer):
+    sn = serializers.IntegerField()
+    name = serializers.CharField()
+    solved = serializers.IntegerField()
+    solve_rate = serializers.FloatField()
+    median_solve_time = serializers.DurationField(allow_null=True)
+    prompts_taken = serializers.IntegerField()
+    wrong_answers = serializers.IntegerField()
+
+
+class CrossAnalyticsSerializer(serializers.Serializer):
+    updated_until = serializers.DateTimeField(allow_null=True)
+    teams = serializers.IntegerField()
+    missions = MissionAnalyticsSerializer(many=True)
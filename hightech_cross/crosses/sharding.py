@@ -0,0 +1,253 @@
+"""Cross sharding for `crosses` app.
+
+Every cross lives in a single database (shard) of `CROSSES_SHARDS`
+together with its missions, prompts, logs and other dependent rows.
+Crosses outside the default database are listed in `CrossLocation`
+directory, teams of all crosses are listed in `UserCross` directory.
+Both directories are kept in the default database.
+
+Teams are authenticated against the default database and mirrored
+to shards of their crosses, as foreign keys can't cross databases.
+
+Queries by cross ID should use `get_cross_db`. Querysets of instances
+loaded from a shard (like `cross.missions`) stay in that shard by Django
+itself, `CrossShardRouter` handles the rest.
+
+Attributes:
+    DIRECTORY_MODELS (t.Tuple[str, ...]): `crosses` models kept
+        in the default database only.
+"""
+import contextlib
+import typing as t
+import uuid
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    models as db_models,
+    transaction,
+)
+
+from . import (
+    models,
+    notifications,
+)
+
+DIRECTORY_MODELS = ('crosslocation', 'usercross', 'requestprofile')
+
+
+def _location_key(cross_id: t.Any) -> str:
+    return f'crosses:location:{cross_id}'
+
+
+def get_shards() -> t.List[str]:
+    """Get aliases of databases crosses can live in."""
+    return list(getattr(settings, 'CROSSES_SHARDS', [DEFAULT_DB_ALIAS]))
+
+
+def choose_shard(cross_id: uuid.UUID) -> str:
+    """Choose database for a new cross by its ID."""
+    shards = get_shards()
+    return shards[cross_id.int % len(shards)]
+
+
+def get_cross_db(cross_id: t.Any) -> str:
+    """Get alias of database cross lives in."""
+    try:
+        cross_id = uuid.UUID(str(cross_id))
+    except ValueError:
+        return DEFAULT_DB_ALIAS
+    key = _location_key(cross_id)
+    database = cache.get(key)
+    if database is None:
+        database = models.CrossLocation.objects.filter(
+            cross_id=cross_id,
+        ).values_list(
+            'database',
+            flat=True,
+        ).first() or DEFAULT_DB_ALIAS
+        cache.set(key, database, notifications.get_cache_timeout(None))
+    return database
+
+
+def set_cross_db(cross_id: uuid.UUID, database: str) -> None:
+    """Record database cross lives in."""
+    if database == DEFAULT_DB_ALIAS:
+        models.CrossLocation.objects.filter(cross_id=cross_id).delete()
+    else:
+        models.CrossLocation.objects.update_or_create(
+            cross_id=cross_id,
+            defaults={'database': database},
+        )
+    key = _location_key(cross_id)
+    transaction.on_commit(lambda: (
+        cache.delete(key),
+        notifications.publish([key]),
+    ))
+
+
+def place_cross(cross_id: uuid.UUID) -> str:
+    """Choose and record database for a new cross."""
+    database = choose_shard(cross_id)
+    set_cross_db(cross_id, database)
+    return database
+
+
+def mirror_users(database: str, user_ids: t.Iterable[int]) -> None:
+    """Copy teams to shard database, so cross data can refer to them."""
+    if database == DEFAULT_DB_ALIAS:
+        return
+    users = list(User.objects.using(DEFAULT_DB_ALIAS).filter(
+        id__in=list(user_ids),
+    ))
+    shard_users = User.objects.using(database)
+    shard_users.bulk_create(users, ignore_conflicts=True)
+    shard_users.bulk_update(users, ['username', 'is_active'])
+
+
+def add_cross_users(cross: models.Cross, user_ids: t.Iterable[int]) -> None:
+    """List teams as cross participants in directory."""
+    models.UserCross.objects.bulk_create(
+        [
+            models.UserCross(
+                user_id=user_id,
+                cross_id=cross.id,
+                begins_at=cross.begins_at,
+            )
+            for user_id in user_ids
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def remove_cross_users(
+    cross_id: uuid.UUID,
+    user_ids: t.Optional[t.Iterable[int]] = None,
+) -> None:
+    """Unlist teams (all by default) from cross participants."""
+    entries = models.UserCross.objects.filter(cross_id=cross_id)
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=list(user_ids))
+    entries.delete()
+
+
+def update_cross(cross: models.Cross) -> None:
+    """Sync cross start time to directory."""
+    models.UserCross.objects.filter(
+        cross_id=cross.id,
+    ).exclude(
+        begins_at=cross.begins_at,
+    ).update(
+        begins_at=cross.begins_at,
+    )
+
+
+@contextlib.contextmanager
+def keep_timestamps(model: t.Type[db_models.Model]) -> t.Iterator[None]:
+    """Let `auto_now` and `auto_now_add` fields of model be copied as is.
+
+    Fields are patched process-wide, so it is for commands only.
+    """
+    fields = [
+        (field, field.auto_now, field.auto_now_add)
+        for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now', False)
+        or getattr(field, 'auto_now_add', False)
+    ]
+    for field, _, _ in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now = auto_now
+            field.auto_now_add = auto_now_add
+
+
+def move_cross(cross: models.Cross, database: str) -> None:
+    """Copy cross with its data to another database, then delete it.
+
+    Both databases are locked in transactions while copying.
+    Rows keep their creation timestamps.
+    """
+    source = cross._state.db
+    querysets = [
+        models.Cross.objects.filter(id=cross.id),
+        models.Cross.users.through.objects.filter(cross_id=cross.id),
+        models.Mission.objects.filter(cross_id=cross.id),
+        models.Prompt.objects.filter(mission__cross_id=cross.id),
+        models.ProgressLog.objects.filter(mission__cross_id=cross.id),
+        models.JoinCode.objects.filter(cross_id=cross.id),
+        models.MissionStats.objects.filter(cross_id=cross.id),
+    ]
+    with transaction.atomic(), transaction.atomic(using=source):
+        with transaction.atomic(using=database):
+            user_ids = set(cross.users.values_list('id', flat=True))
+            for queryset in querysets[4:6]:
+                user_ids.update(
+                    queryset.using(source).values_list('user_id', flat=True),
+                )
+            mirror_users(database, user_ids)
+            for queryset in querysets:
+                rows = list(queryset.using(source).order_by())
+                if isinstance(queryset.model._meta.pk, db_models.AutoField):
+                    for row in rows:
+                        row.pk = None
+                with keep_timestamps(queryset.model):
+                    queryset.model.objects.using(database).bulk_create(
+                        rows,
+                        batch_size=1000,
+                    )
+            cross_users = list(cross.users.values_list('id', flat=True))
+            models.Cross.objects.using(source).filter(id=cross.id).delete()
+            set_cross_db(cross.id, database)
+            add_cross_users(cross, cross_users)
+
+
+class CrossShardRouter:
+    """Route directory models to the default database, cross data to shards.
+
+    Instances loaded from a database are left there by Django itself.
+    New ones are routed by their cross if possible.
+    """
+
+    def _db_for_model(self, model: t.Type, **hints) -> t.Optional[str]:
+        if model._meta.app_label != 'crosses':
+            return None
+        if model._meta.model_name in DIRECTORY_MODELS:
+            return DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if instance is None or instance._state.db:
+            return None
+        if isinstance(instance, models.Cross):
+            return get_cross_db(instance.id)
+        cross_id = getattr(instance, 'cross_id', None)
+        if cross_id is None:
+            return None
+        return get_cross_db(cross_id)
+
+    db_for_read = _db_for_model
+    db_for_write = _db_for_model
+
+    def allow_relation(
+        self,
+        obj1: t.Any,
+        obj2: t.Any,
+        **hints,
+    ) -> t.Optional[bool]:
+        if isinstance(obj1, User) or isinstance(obj2, User):
+            return True
+        return None
+
+    def allow_migrate(
+        self,
+        db: str,
+        app_label: str,
+        model_name: t.Optional[str] = None,
+        **hints,
+    ) -> t.Optional[bool]:
+        if app_label == 'crosses' and model_name in DIRECTORY_MODELS:
+            return db == DEFAULT_DB_ALIAS
+        return None
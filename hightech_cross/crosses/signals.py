@@ -0,0 +1,131 @@
+"""Model signal handlers for `crosses` app.
+
+Keep caches from `cache.py` and directories from `sharding.py`
+consistent with DB. Caches are dropped on commit of the DB
+the instance is saved to.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+)
+from django.dispatch import receiver
+
+from . import (
+    cache,
+    models,
+    sharding,
+)
+
+
+@receiver(post_save, sender=models.Cross)
+def update_cross_directory(instance: models.Cross, **kwargs) -> None:
+    sharding.update_cross(instance)
+
+
+@receiver(pre_delete, sender=models.Cross)
+def drop_cross_directory(instance: models.Cross, **kwargs) -> None:
+    sharding.remove_cross_users(instance.id)
+
+
+@receiver(m2m_changed, sender=models.Cross.users.through)
+def update_user_directory(
+    instance: models.Cross,
+    action: str,
+    pk_set: set,
+    using: str,
+    **kwargs,
+) -> None:
+    if isinstance(instance, models.Cross):
+        if action == 'pre_add':
+            sharding.mirror_users(using, pk_set)
+        elif action == 'post_add':
+            sharding.add_cross_users(instance, pk_set)
+        elif action in ('post_remove', 'post_clear'):
+            sharding.remove_cross_users(instance.id, pk_set)
+    elif action == 'post_add':
+        for cross in models.Cross.objects.using(using).filter(id__in=pk_set):
+            sharding.add_cross_users(cross, [instance.id])
+    elif action == 'post_remove':
+        for cross_id in pk_set:
+            sharding.remove_cross_users(cross_id, [instance.id])
+    elif action == 'post_clear':
+        models.UserCross.objects.filter(
+            user_id=instance.id,
+        ).exclude(
+            cross_id__in=models.CrossLocation.objects.values('cross_id'),
+        ).delete()
+
+
+@receiver(post_save, sender=models.Cross)
+@receiver(pre_delete, sender=models.Cross)
+def drop_cross(instance: models.Cross, **kwargs) -> None:
+    cache.invalidate(
+        instance.id,
+        'cross',
+        'catalog',
+        *cache.LEADERBOARD_ENTITIES,
+        using=instance._state.db,
+    )
+    cache.invalidate_users(instance.users.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=models.Cross.users.through)
+def drop_cross_users(
+    instance: models.Cross,
+    action: str,
+    pk_set: set,
+    using: str,
+    **kwargs,
+) -> None:
+    if not action.startswith('post_'):
+        return
+    if isinstance(instance, models.Cross):
+        cache.invalidate(
+            instance.id,
+            *cache.LEADERBOARD_ENTITIES,
+            using=using,
+        )
+        user_ids = pk_set or instance.users.values_list('id', flat=True)
+    else:
+        for cross_id in pk_set or ():
+            cache.invalidate(
+                cross_id,
+                *cache.LEADERBOARD_ENTITIES,
+                using=using,
+            )
+        user_ids = [instance.id]
+    cache.invalidate_users(user_ids)
+
+
+@receiver(post_save, sender=models.Mission)
+@receiver(post_delete, sender=models.Mission)
+def drop_mission(instance: models.Mission, **kwargs) -> None:
+    cache.invalidate(
+        instance.cross_id,
+        'catalog',
+        *cache.LEADERBOARD_ENTITIES,
+        using=instance._state.db,
+    )
+
+
+@receiver(post_save, sender=models.Prompt)
+@receiver(post_delete, sender=models.Prompt)
+def drop_prompt(instance: models.Prompt, **kwargs) -> None:
+    cache.invalidate(
+        instance.mission.cross_id,
+        'catalog',
+        using=instance._state.db,
+    )
+
+
+@receiver(post_save, sender=models.ProgressLog)
+@receiver(post_delete, sender=models.ProgressLog)
+def drop_progress_log(instance: models.ProgressLog, **kwargs) -> None:
+    if instance.event == models.ProgressEvent.RIGHT_ANSWER:
+        cache.invalidate(
+            instance.mission.cross_id,
+            *cache.LEADERBOARD_ENTITIES,
+            using=instance._state.db,
+        )
@@ -0,0 +1,339 @@
+"""Shared-memory leaderboard snapshots.
+
+Rendered leaderboards of active crosses are published as files
+in `CROSSES_SNAPSHOT_DIR` (like `/dev/shm/hightech_cross`)
+by a single writer per directory, elected with `flock`.
+Every worker process maps them into memory and serves them
+without computing or caching its own copies.
+
+Snapshot file is a header followed by bodies in every content encoding::
+
+    magic (4s) | format (H) | version (Q) | read at (d) | etag (40s)
+    bodies (H)
+    encoding (8s) | offset (Q) | length (Q)  # For every body.
+    ...bodies...
+
+Files are replaced atomically, so readers never see partial ones,
+and remap a file only when it has been replaced.
+Snapshots are not served if the writer has not touched its heartbeat
+file for `MAX_AGE` seconds.
+Writer takes payloads from its process cache, so it relies
+on cache invalidation broadcast (see `notifications.py`) and publishes
+only while its listener is connected. Snapshots read from DB before
+the reader dropped the payload itself are served marked stale until
+the writer publishes a newer one, instead of being computed
+by every worker meanwhile.
+Bodies are served in chunks straight from the mapping.
+
+Attributes:
+    MAGIC (bytes): Snapshot file signature.
+    FORMAT (int): Snapshot file format version.
+    MAX_AGE (float): Heartbeat age after which snapshots are ignored.
+    KEEP_AFTER_END (timedelta): How long final standings are published.
+    CHUNK_SIZE (int): Size of body chunks served.
+"""
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+import typing as t
+import uuid
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils.timezone import now
+
+from . import (
+    cache,
+    models,
+    notifications,
+    sharding,
+)
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'HCLB'
+FORMAT = 2
+MAX_AGE = 10.0
+KEEP_AFTER_END = timedelta(hours=1)
+CHUNK_SIZE = 64 * 1024
+
+_HEADER = struct.Struct('<4sHQd40sH')
+_ENTRY = struct.Struct('<8sQQ')
+_LOCK_FILE = 'writer.lock'
+_HEARTBEAT_FILE = 'writer.heartbeat'
+
+
+class Snapshot(t.NamedTuple):
+    """Leaderboard snapshot mapped into memory.
+
+    Attributes:
+        version (int): Snapshot version, grows with every publication.
+        rendered (cache.Rendered): Payload, its bodies are views
+            of shared memory and `data` is not kept.
+    """
+
+    version: int
+    rendered: cache.Rendered
+
+
+_mapped: t.Dict[str, t.Tuple[int, Snapshot]] = {}
+_heartbeat_checked_at = 0.0
+_writer_alive = False
+
+
+def get_directory() -> t.Optional[str]:
+    """Get snapshot directory, `None` if snapshots are disabled."""
+    return getattr(settings, 'CROSSES_SNAPSHOT_DIR', None)
+
+
+def _path(directory: str, entity: str, cross_id: uuid.UUID) -> str:
+    return os.path.join(directory, f'{cross_id}.{entity}.snap')
+
+
+def pack(version: int, rendered: cache.Rendered) -> bytes:
+    """Serialize rendered payload to snapshot file content."""
+    entries = []
+    offset = _HEADER.size + _ENTRY.size * len(rendered.bodies)
+    for encoding, body in rendered.bodies.items():
+        entries.append(_ENTRY.pack(encoding.encode(), offset, len(body)))
+        offset += len(body)
+    return b''.join([
+        _HEADER.pack(
+            MAGIC,
+            FORMAT,
+            version,
+            rendered.read_at,
+            rendered.etag.encode(),
+            len(rendered.bodies),
+        ),
+        *entries,
+        *rendered.bodies.values(),
+    ])
+
+
+def unpack(buffer: t.Union[bytes, mmap.mmap]) -> Snapshot:
+    """Parse snapshot file content, bodies are views of `buffer`."""
+    view = memoryview(buffer)
+    (
+        magic,
+        file_format,
+        version,
+        read_at,
+        etag,
+        count,
+    ) = _HEADER.unpack_from(view)
+    if magic != MAGIC or file_format != FORMAT:
+        raise ValueError('Not a leaderboard snapshot.')
+    bodies = {}
+    for number in range(count):
+        encoding, offset, length = _ENTRY.unpack_from(
+            view,
+            _HEADER.size + _ENTRY.size * number,
+        )
+        bodies[encoding.rstrip(b'\0').decode()] = view[offset:offset + length]
+    return Snapshot(
+        version,
+        cache.Rendered(
+            None,
+            etag.rstrip(b'\0').decode(),
+            bodies,
+            read_at=read_at,
+        ),
+    )
+
+
+def iter_chunks(body: memoryview) -> t.Iterator[bytes]:
+    """Split snapshot body into chunks for streaming response."""
+    for start in range(0, len(body), CHUNK_SIZE):
+        yield body[start:start + CHUNK_SIZE].tobytes()
+
+
+def _is_writer_alive(directory: str) -> bool:
+    global _heartbeat_checked_at, _writer_alive
+    moment = time.monotonic()
+    if moment - _heartbeat_checked_at >= 1:
+        try:
+            age = time.time() - os.stat(
+                os.path.join(directory, _HEARTBEAT_FILE),
+            ).st_mtime
+        except FileNotFoundError:
+            age = MAX_AGE
+        _writer_alive = age < MAX_AGE
+        _heartbeat_checked_at = moment
+    return _writer_alive
+
+
+def read(
+    cross_id: uuid.UUID,
+    compact: bool = False,
+) -> t.Optional[cache.Rendered]:
+    """Get published cross leaderboard payload if any.
+
+    File is mapped again only if it was replaced since last read.
+    Payload is marked stale if this process has dropped it since
+    it was read: a newer one is pending from the writer.
+    """
+    directory = get_directory()
+    if directory is None or not _is_writer_alive(directory):
+        return None
+    entity = 'compact-data' if compact else 'cross-data'
+    path = _path(directory, entity, cross_id)
+    try:
+        inode = os.stat(path).st_ino
+    except FileNotFoundError:
+        return None
+    mapped = _mapped.get(path)
+    if mapped is None or mapped[0] != inode:
+        try:
+            with open(path, 'rb') as snapshot_file:
+                inode = os.fstat(snapshot_file.fileno()).st_ino
+                buffer = mmap.mmap(
+                    snapshot_file.fileno(),
+                    0,
+                    access=mmap.ACCESS_READ,
+                )
+            mapped = (inode, unpack(buffer))
+        except (OSError, ValueError, struct.error):
+            logger.exception('Unreadable leaderboard snapshot %s', path)
+            return None
+        _mapped[path] = mapped
+    rendered = mapped[1].rendered
+    if cache.is_outdated(entity, cross_id, rendered):
+        return rendered._replace(stale=True)
+    return rendered
+
+
+class SnapshotWriter:
+    """Leaderboard snapshot publisher.
+
+    Attributes:
+        directory (str): Snapshot directory.
+        clock (t.Callable[[], datetime]): Current time source.
+        etags (t.Dict[str, str]): Published payload versions by file path.
+        versions (t.Dict[str, int]): Published snapshot versions by file path.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        clock: t.Callable[[], datetime] = now,
+    ):
+        self.directory = directory
+        self.clock = clock
+        self.etags: t.Dict[str, str] = {}
+        self.versions: t.Dict[str, int] = {}
+        self._lock_file: t.Optional[t.IO] = None
+
+    def acquire(self) -> bool:
+        """Try to become the only writer of the directory."""
+        if self._lock_file is not None:
+            return True
+        os.makedirs(self.directory, exist_ok=True)
+        lock_file = open(os.path.join(self.directory, _LOCK_FILE), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+    def publish(self, path: str, rendered: cache.Rendered) -> bool:
+        """Replace snapshot file unless it has the same payload."""
+        if self.etags.get(path) == rendered.etag:
+            return False
+        version = self.versions.get(path)
+        if version is None:
+            try:
+                with open(path, 'rb') as snapshot_file:
+                    version = unpack(snapshot_file.read()).version
+            except (OSError, ValueError, struct.error):
+                version = 0
+        version += 1
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as temp_file:
+            temp_file.write(pack(version, rendered))
+        os.replace(temp_path, path)
+        self.etags[path] = rendered.etag
+        self.versions[path] = version
+        return True
+
+    def run_once(self) -> int:
+        """Publish changed leaderboards of active crosses, drop others.
+
+        Return number of snapshots published.
+        """
+        moment = self.clock()
+        published = 0
+        active = set()
+        for database in sharding.get_shards():
+            for cross in models.Cross.objects.using(database).filter(
+                begins_at__lte=moment,
+                ends_at__gt=moment - KEEP_AFTER_END,
+            ):
+                for entity, get_data in (
+                    ('cross-data', cache.get_cross_data),
+                    ('compact-data', cache.get_compact_data),
+                ):
+                    path = _path(self.directory, entity, cross.id)
+                    active.add(path)
+                    published += self.publish(path, get_data(cross))
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.endswith('.snap') and path not in active:
+                os.remove(path)
+                self.etags.pop(path, None)
+                self.versions.pop(path, None)
+        heartbeat = os.path.join(self.directory, _HEARTBEAT_FILE)
+        with open(heartbeat, 'a'):
+            os.utime(heartbeat)
+        return published
+
+    def run_forever(
+        self,
+        interval: float,
+        stop: t.Optional[threading.Event] = None,
+    ) -> None:
+        """Publish every `interval` seconds while being the writer.
+
+        Nothing is published while cache listener is disconnected,
+        so readers stop serving snapshots after `MAX_AGE`.
+        """
+        if stop is None:
+            stop = threading.Event()
+        while not stop.is_set():
+            if notifications.is_listening() and self.acquire():
+                close_old_connections()
+                try:
+                    self.run_once()
+                except Exception:
+                    logger.exception('Leaderboard snapshot writer failed')
+            stop.wait(interval)
+
+
+def start_writer_thread() -> threading.Thread:
+    """Run snapshot writer in a daemon thread of current process.
+
+    Every worker may run one, a single one publishes at a time.
+    """
+    if not getattr(settings, 'CROSSES_CACHE_LISTENER', False):
+        logger.warning(
+            'Leaderboard snapshots are published only with cache listener',
+        )
+    writer = SnapshotWriter(get_directory())
+    thread = threading.Thread(
+        target=writer.run_forever,
+        args=(getattr(settings, 'CROSSES_SNAPSHOT_INTERVAL', 1),),
+        name='crosses-snapshot-writer',
+        daemon=True,
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,81 @@
+"""Test data helpers for `crosses` app."""
+import typing as t
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from django.contrib.auth.models import User
+from django.utils.timezone import now
+
+from .. import models
+
+
+def create_team(username: str, **kwargs) -> User:
+    """Create user (team)."""
+    return User.objects.create_user(username, password='secret', **kwargs)
+
+
+def create_cross(
+    teams: t.Iterable[User] = (),
+    missions: int = 3,
+    begins_at: t.Optional[datetime] = None,
+    duration: timedelta = timedelta(hours=2),
+    **kwargs,
+) -> models.Cross:
+    """Create cross with missions, two prompts each.
+
+    Cross begins an hour ago by default.
+    Mission `sn` has answer `answer<sn>`.
+    """
+    if begins_at is None:
+        begins_at = now() - timedelta(hours=1)
+    cross = models.Cross.objects.create(
+        name='Test cross',
+        begins_at=begins_at,
+        ends_at=begins_at + duration,
+        **kwargs,
+    )
+    cross.users.add(*teams)
+    for sn in range(1, missions + 1):
+        mission = models.Mission.objects.create(
+            cross=cross,
+            sn=sn,
+            name=f'Mission {sn}',
+            description='What is it?',
+            lat='55.75222',
+            lon='37.61556',
+            answer=f'answer{sn}',
+        )
+        for prompt_sn in (1, 2):
+            models.Prompt.objects.create(
+                mission=mission,
+                sn=prompt_sn,
+                text=f'Prompt {prompt_sn}',
+            )
+    return cross
+
+
+def create_log(
+    mission: models.Mission,
+    user: User,
+    event: str,
+    created_at: datetime,
+    penalty: timedelta = timedelta(0),
+    **details,
+) -> models.ProgressLog:
+    """Create progress log with given creation date."""
+    log = models.ProgressLog.objects.using(mission._state.db).create(
+        mission=mission,
+        user=user,
+        event=event,
+        details=details,
+        penalty=penalty,
+    )
+    models.ProgressLog.objects.using(mission._state.db).filter(
+        id=log.id,
+    ).update(
+        created_at=created_at,
+    )
+    log.created_at = created_at
+    return log
@@ -0,0 +1,143 @@
+import json
+import unittest
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+
+from .. import models
+from ..sharding import (
+    get_shards,
+    move_cross,
+)
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+
+class CrossAdminTest(TestCase):
+    databases = set(get_shards())
+
+    def setUp(self):
+        cache.clear()
+        self.cross = create_cross([create_team('team1')])
+        self.client.force_login(User.objects.create_superuser(
+            'admin',
+            password='secret',
+        ))
+
+    def test_default_database(self):
+        response = self.client.get('/admin/crosses/cross/')
+        self.assertContains(response, self.cross.id)
+        response = self.client.get(
+            f'/admin/crosses/cross/{self.cross.id}/change/',
+        )
+        self.assertContains(response, self.cross.name)
+
+    def test_unknown_shard(self):
+        response = self.client.get('/admin/crosses/cross/?shard=nonsense')
+        self.assertContains(response, self.cross.id)
+
+
+@unittest.skipIf(
+    len(get_shards()) < 2,
+    'Run with CROSSES_SHARDS=shard1 to test sharding.',
+)
+class ShardedAdminTest(TestCase):
+    databases = set(get_shards())
+
+    def setUp(self):
+        cache.clear()
+        self.shard = get_shards()[1]
+        self.cross = create_cross([create_team('team1')])
+        move_cross(self.cross, self.shard)
+        self.client.force_login(User.objects.create_superuser(
+            'admin',
+            password='secret',
+        ))
+
+    def test_change_list_of_shard(self):
+        response = self.client.get('/admin/crosses/cross/')
+        self.assertNotContains(response, self.cross.id)
+        response = self.client.get(f'/admin/crosses/cross/?shard={self.shard}')
+        self.assertContains(response, self.cross.id)
+        mission = models.Mission.objects.using(self.shard).get(
+            cross_id=self.cross.id,
+            sn=3,
+        )
+        response = self.client.get(
+            f'/admin/crosses/mission/?shard={self.shard}',
+        )
+        self.assertContains(response, mission.id)
+
+    def test_change_in_shard(self):
+        mission = models.Mission.objects.using(self.shard).get(
+            cross_id=self.cross.id,
+            sn=1,
+        )
+        url = f'/admin/crosses/mission/{mission.id}/change/'
+        self.assertEqual(self.client.get(url).status_code, 200)
+        response = self.client.post(url, {
+            'name': 'Renamed',
+            'description': mission.description,
+            'lat': mission.lat,
+            'lon': mission.lon,
+            'answer': mission.answer,
+            'cross': self.cross.id,
+            'sn': mission.sn,
+        })
+        self.assertEqual(response.status_code, 302)
+        mission.refresh_from_db()
+        self.assertEqual(mission.name, 'Renamed')
+        self.assertFalse(models.Mission.objects.using('default').exists())
+
+    def test_add_from_shard_change_list(self):
+        response = self.client.post(
+            f'/admin/crosses/mission/add/'
+            f'?_changelist_filters=shard%3D{self.shard}',
+            {
+                'name': 'Added',
+                'description': 'What is it?',
+                'lat': '55.75222',
+                'lon': '37.61556',
+                'answer': 'answer4',
+                'cross': self.cross.id,
+                'sn': 4,
+            },
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(
+            models.Mission.objects.using(self.shard).filter(
+                cross_id=self.cross.id,
+                sn=4,
+            ).exists(),
+        )
+
+    def test_import_to_shard(self):
+        cross_id = uuid.UUID(int=get_shards().index(self.shard))
+        definition = {
+            'id': str(cross_id),
+            'name': 'Imported',
+            'begins_at': '2020-05-01T10:00:00+03:00',
+            'ends_at': '2020-05-01T14:00:00+03:00',
+        }
+        response = self.client.post('/admin/crosses/cross/import/', {
+            'definition': SimpleUploadedFile(
+                'cross.json',
+                json.dumps(definition).encode(),
+            ),
+        })
+        self.assertRedirects(
+            response,
+            f'/admin/crosses/cross/?shard={self.shard}',
+        )
+        self.assertTrue(
+            models.Cross.objects.using(self.shard).filter(
+                id=cross_id,
+            ).exists(),
+        )
+        response = self.client.get(f'/admin/crosses/cross/{cross_id}/change/')
+        self.assertContains(response, 'Imported')
@@ -0,0 +1,80 @@
+import base64
+import json
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import (
+    RequestFactory,
+    TransactionTestCase,
+)
+
+from .. import async_views
+from ..authentication import make_token
+from ..sharding import get_shards
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+
+class AsyncReadViewTest(TransactionTestCase):
+    databases = set(get_shards())
+
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+        self.mission = self.cross.missions.get(sn=1)
+        self.mission.get_prompt(self.team.id, 1)
+        self.views = (
+            (async_views.current_cross, {}),
+            (async_views.mission_list, {'cross_pk': str(self.cross.id)}),
+            (
+                async_views.prompt_list,
+                {'cross_pk': 'current', 'mission_pk': '1'},
+            ),
+        )
+
+    def get(self, view, authorization: str = '', **kwargs) -> HttpResponse:
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=authorization)
+        return async_to_sync(view)(request, **kwargs)
+
+    def basic(self, password: str = 'secret') -> str:
+        credentials = base64.b64encode(f'team1:{password}'.encode())
+        return f'Basic {credentials.decode()}'
+
+    def test_token(self):
+        token = make_token(self.team.id, self.cross.id)
+        for view, kwargs in self.views:
+            with self.subTest(view=view.__name__):
+                response = self.get(view, f'Token {token}', **kwargs)
+                self.assertEqual(response.status_code, 200)
+
+    def test_basic(self):
+        for view, kwargs in self.views:
+            with self.subTest(view=view.__name__):
+                response = self.get(view, self.basic(), **kwargs)
+                self.assertEqual(response.status_code, 200)
+
+    def test_same_payload_as_viewset(self):
+        response = self.get(
+            async_views.prompt_list,
+            self.basic(),
+            cross_pk='current',
+            mission_pk='1',
+        )
+        self.assertEqual(
+            [prompt['text'] for prompt in json.loads(response.content)],
+            ['Prompt 1', None],
+        )
+
+    def test_authentication_failed(self):
+        for authorization in ('', 'Token nonsense', self.basic('wrong')):
+            with self.subTest(authorization=authorization):
+                response = self.get(
+                    async_views.current_cross,
+                    authorization,
+                )
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['WWW-Authenticate'], 'Token')
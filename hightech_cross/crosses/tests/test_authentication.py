@@ -0,0 +1,146 @@
+import unittest
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import (
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from django.utils.timezone import now
+from rest_framework import exceptions
+from rest_framework.test import APIClient
+
+from .. import models
+from ..authentication import (
+    SignedTokenAuthentication,
+    make_token,
+    read_token,
+)
+from ..sharding import (
+    get_shards,
+    move_cross,
+)
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+CROSS_ID = '6a6d3b6e-3c3b-4d4e-9d0a-0f2a3c4b5d6e'
+
+
+class SignedTokenTest(SimpleTestCase):
+    def test_round_trip(self):
+        user = read_token(make_token(5, CROSS_ID))
+        self.assertEqual(user.id, 5)
+        self.assertEqual(str(user.cross_id), CROSS_ID)
+        self.assertFalse(user.is_staff)
+
+    @override_settings(CROSSES_TOKEN_MAX_AGE=-1)
+    def test_expired(self):
+        with self.assertRaisesMessage(
+            exceptions.AuthenticationFailed,
+            'Token expired.',
+        ):
+            read_token(make_token(5, CROSS_ID))
+
+    def test_bad_signature(self):
+        token = make_token(5, CROSS_ID)
+        for bad_token in (token[:-2] + 'xx', 'nonsense', ''):
+            with self.subTest(token=bad_token):
+                with self.assertRaisesMessage(
+                    exceptions.AuthenticationFailed,
+                    'Invalid token.',
+                ):
+                    read_token(bad_token)
+
+    def test_header(self):
+        authentication = SignedTokenAuthentication()
+        factory = RequestFactory()
+        self.assertIsNone(authentication.authenticate(
+            factory.get('/', HTTP_AUTHORIZATION='Basic dGVhbTpzZWNyZXQ='),
+        ))
+        with self.assertRaisesMessage(
+            exceptions.AuthenticationFailed,
+            'Invalid token header.',
+        ):
+            authentication.authenticate(
+                factory.get('/', HTTP_AUTHORIZATION='Token a b'),
+            )
+
+
+class TokenViewTest(TestCase):
+    databases = set(get_shards())
+    url = '/api/tokens/'
+
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+        self.next_cross = create_cross(
+            [self.team],
+            begins_at=now() + timedelta(days=1),
+        )
+        self.client = APIClient()
+
+    def test_join_code_is_one_time(self):
+        join_code, = models.JoinCode.generate(self.cross)
+        response = self.client.post(self.url, {'code': join_code.code})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['cross'], str(self.cross.id))
+        response = self.client.post(self.url, {'code': join_code.code})
+        self.assertEqual(response.status_code, 400)
+
+    def test_token_authenticates(self):
+        join_code, = models.JoinCode.generate(self.cross)
+        token = self.client.post(
+            self.url,
+            {'code': join_code.code},
+        ).json()['token']
+        response = self.client.get(
+            '/api/crosses/current/missions/status/',
+            HTTP_AUTHORIZATION=f'Token {token}',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_for_session_user_current_cross(self):
+        self.client.force_authenticate(self.team)
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['cross'], str(self.cross.id))
+
+    def test_for_session_user_given_cross(self):
+        self.client.force_authenticate(self.team)
+        response = self.client.post(self.url, {'cross': self.cross.id})
+        self.assertEqual(response.status_code, 201)
+        response = self.client.post(self.url, {'cross': self.next_cross.id})
+        self.assertEqual(response.status_code, 404)
+
+    def test_code_required(self):
+        response = self.client.post(self.url)
+        self.assertEqual(response.status_code, 400)
+
+
+@unittest.skipIf(
+    len(get_shards()) < 2,
+    'Run with CROSSES_SHARDS=shard1 to test sharding.',
+)
+class ShardJoinCodeTest(TestCase):
+    databases = set(get_shards())
+
+    def test_redeemed_once_across_shards(self):
+        cache.clear()
+        cross = create_cross([create_team('team1')])
+        move_cross(cross, get_shards()[1])
+        cross = models.Cross.objects.using(get_shards()[1]).get(id=cross.id)
+        join_code, = models.JoinCode.generate(cross)
+        self.assertIsNotNone(models.JoinCode.redeem(
+            join_code.code,
+            using=get_shards()[1],
+        ))
+        for database in get_shards():
+            with self.subTest(database=database):
+                self.assertIsNone(
+                    models.JoinCode.redeem(join_code.code, using=database),
+                )
@@ -0,0 +1,57 @@
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.db import connection
+from django.test import (
+    TestCase,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+
+from .. import (
+    budgets,
+    cache,
+)
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+
+class LeaderboardBudgetTest(TestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+        self.cross.missions.get(sn=1).give_answer(self.team.id, 'answer1')
+        cache.get_cross_data(self.cross)
+        django_cache.delete(f'crosses:cross-data:{self.cross.id}')
+
+    def count_queries(self, cross) -> int:
+        with CaptureQueriesContext(connection) as queries:
+            cross.leaderboard
+        return len(queries)
+
+    def test_leaderboard_queries_do_not_grow(self):
+        cross = create_cross(
+            [create_team(f'team{number}') for number in range(2, 6)],
+            missions=6,
+        )
+        self.assertEqual(
+            self.count_queries(cross),
+            self.count_queries(self.cross),
+        )
+
+    def test_no_refresh_while_writing(self):
+        with mock.patch.object(budgets, 'refresh_in_background') as refresh:
+            with budgets.write_priority():
+                data = budgets.get_leaderboard_data(self.cross)
+        self.assertTrue(data.stale)
+        refresh.assert_not_called()
+
+    @override_settings(CROSSES_MAX_LEADERBOARD_BUILDS=0)
+    def test_refresh_when_builds_exhausted(self):
+        with mock.patch.object(budgets, 'refresh_in_background') as refresh:
+            data = budgets.get_leaderboard_data(self.cross)
+        self.assertTrue(data.stale)
+        refresh.assert_called_once_with('cross-data', self.cross)
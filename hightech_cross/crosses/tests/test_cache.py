@@ -0,0 +1,44 @@
+import json
+
+from django.core.cache import cache as django_cache
+from django.db import transaction
+from django.test import TransactionTestCase
+
+from .. import (
+    cache,
+    notifications,
+)
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+
+class InvalidationTest(TransactionTestCase):
+    def setUp(self):
+        django_cache.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+
+    def test_dropped_on_commit(self):
+        cache.get_cross_data(self.cross)
+        with transaction.atomic():
+            self.cross.missions.get(sn=1).give_answer(self.team.id, 'answer1')
+            self.assertIsNotNone(cache.peek('cross-data', self.cross.id))
+        self.assertIsNone(cache.peek('cross-data', self.cross.id))
+
+    def test_kept_on_rollback(self):
+        cache.get_cross_data(self.cross)
+        with transaction.atomic():
+            self.cross.missions.get(sn=1).give_answer(self.team.id, 'answer1')
+            transaction.set_rollback(True)
+        self.assertIsNotNone(cache.peek('cross-data', self.cross.id))
+
+    def test_own_notification_handled(self):
+        cache.get_cross_data(self.cross)
+        notifications.handle(json.dumps({
+            'origin': notifications.ORIGIN,
+            'version': 1,
+            'keys': [f'crosses:cross-data:{self.cross.id}'],
+        }))
+        self.assertIsNone(cache.peek('cross-data', self.cross.id))
@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+)
+
+from .. import models
+from ..serializers import (
+    BitsetField,
+    CompactCrossSerializer,
+)
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+
+class BitsetFieldTest(SimpleTestCase):
+    def test_empty(self):
+        self.assertEqual(BitsetField().to_representation(0), '')
+
+    def test_little_endian(self):
+        field = BitsetField()
+        self.assertEqual(field.to_representation(5), 'BQ==')
+        self.assertEqual(field.to_representation(1 << 8), 'AAE=')
+
+    def test_beyond_bigint(self):
+        self.assertEqual(
+            BitsetField().to_representation(1 << 64 | 1),
+            'AQAAAAAAAAAB',
+        )
+
+
+class CompactLeaderboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.other_team = create_team('team2')
+        self.idle_team = create_team('team3')
+        self.cross = create_cross(
+            [self.team, self.other_team, self.idle_team],
+        )
+        first, second, third = self.cross.missions.order_by('sn')
+        first.give_answer(self.team.id, 'wrong')
+        first.give_answer(self.team.id, 'answer1')
+        second.get_prompt(self.team.id, 1)
+        third.give_answer(self.team.id, 'answer3')
+        second.give_answer(self.other_team.id, 'answer2')
+
+    def test_matches_leaderboard(self):
+        compact = self.cross.compact_leaderboard
+        self.assertEqual(compact['missions'], [1, 2, 3])
+        self.assertEqual(
+            [
+                (team['name'], team['finished'], team['rank'])
+                for team in compact['teams']
+            ],
+            [('team1', 0b101, 1), ('team2', 0b010, 2), ('team3', 0, 3)],
+        )
+        self.assertEqual(
+            [
+                (
+                    team['name'],
+                    team['missions_finished'],
+                    timedelta(seconds=team['penalty']),
+                )
+                for team in compact['teams']
+            ],
+            [
+                (
+                    team['name'],
+                    team['missions_finished'],
+                    timedelta(seconds=int(team['penalty'].total_seconds())),
+                )
+                for team in self.cross.leaderboard
+            ],
+        )
+
+    def test_unfinished_mission_penalty_ignored(self):
+        team = self.cross.compact_leaderboard['teams'][0]
+        finished_penalty = sum(
+            models.ProgressLog.objects.filter(
+                user=self.team,
+                mission__sn__in=[1, 3],
+            ).values_list('penalty', flat=True),
+            timedelta(0),
+        )
+        self.assertEqual(
+            team['penalty'],
+            int(finished_penalty.total_seconds()),
+        )
+
+    def test_many_missions(self):
+        cross = create_cross([self.team], missions=70)
+        cross.missions.get(sn=66).give_answer(self.team.id, 'answer66')
+        compact = cross.compact_leaderboard
+        self.assertEqual(compact['missions'], list(range(1, 71)))
+        self.assertEqual(compact['teams'][0]['finished'], 1 << 65)
+        self.assertEqual(compact['teams'][0]['missions_finished'], 1)
+
+    def test_serialized(self):
+        data = CompactCrossSerializer(self.cross).data
+        self.assertEqual(
+            [
+                (team['name'], team['finished'])
+                for team in data['leaderboard']['teams']
+            ],
+            [('team1', 'BQ=='), ('team2', 'Ag=='), ('team3', '')],
+        )
@@ -0,0 +1,127 @@
+import io
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+)
+from django.utils.timezone import now
+
+from .. import models
+from ..replay import (
+    Replay,
+    score_event,
+)
+from .factories import (
+    create_cross,
+    create_log,
+    create_team,
+)
+
+
+class ScoreEventTest(SimpleTestCase):
+    rules = models.ScoringRules(
+        prompt_penalty=timedelta(minutes=5),
+        wrong_answer_penalty=timedelta(minutes=10),
+    )
+    begins_at = now()
+
+    def score(self, event: str) -> timedelta:
+        return score_event(
+            self.rules,
+            event,
+            self.begins_at + timedelta(hours=1),
+            self.begins_at,
+        )
+
+    def test_prompt(self):
+        self.assertEqual(
+            self.score(models.ProgressEvent.GET_PROMPT),
+            timedelta(minutes=5),
+        )
+
+    def test_wrong_answer(self):
+        self.assertEqual(
+            self.score(models.ProgressEvent.WRONG_ANSWER),
+            timedelta(minutes=10),
+        )
+
+    def test_right_answer(self):
+        self.assertEqual(
+            self.score(models.ProgressEvent.RIGHT_ANSWER),
+            timedelta(hours=1),
+        )
+
+
+class ReplayTest(TestCase):
+    def setUp(self):
+        self.team = create_team('team1')
+        self.other_team = create_team('team2')
+        self.cross = create_cross([self.team, self.other_team])
+        self.missions = list(self.cross.missions.all())
+        first, second, _ = self.missions
+        first.get_prompt(self.team.id, 1)
+        first.give_answer(self.team.id, 'wrong')
+        first.give_answer(self.team.id, 'answer1')
+        second.give_answer(self.other_team.id, 'answer2')
+        second.give_answer(self.team.id, 'wrong')
+
+    def test_stored_rules(self):
+        replay = Replay(self.cross)
+        self.assertEqual(list(replay), [])
+        self.assertEqual(replay.leaderboard, self.cross.leaderboard)
+
+    def test_overrides(self):
+        replay = Replay(self.cross, {'prompt_penalty': timedelta(0)})
+        prompt_log = models.ProgressLog.objects.get(
+            event=models.ProgressEvent.GET_PROMPT,
+        )
+        self.assertEqual(
+            [(diff.log_id, diff.replayed) for diff in replay],
+            [(prompt_log.id, timedelta(0))],
+        )
+        stored = {
+            team['name']: team['penalty']
+            for team in self.cross.leaderboard
+        }
+        replayed = {
+            team['name']: team['penalty']
+            for team in replay.leaderboard
+        }
+        self.assertEqual(
+            replayed['team1'],
+            stored['team1'] - models.PROMPT_PENALTY,
+        )
+        self.assertEqual(replayed['team2'], stored['team2'])
+
+    def test_penalties_after_finish_ignored(self):
+        leaderboard = self.cross.leaderboard
+        create_log(
+            self.missions[0],
+            self.team,
+            models.ProgressEvent.WRONG_ANSWER,
+            now(),
+            penalty=models.WRONG_ANSWER_PENALTY,
+        )
+        replay = Replay(self.cross)
+        list(replay)
+        self.assertEqual(replay.leaderboard, leaderboard)
+
+    def test_command_applies_diffs(self):
+        stdout = io.StringIO()
+        call_command(
+            'replay_cross',
+            str(self.cross.id),
+            '--wrong-answer-penalty',
+            '00:01:00',
+            '--apply',
+            stdout=stdout,
+        )
+        self.assertIn('Updated 2 penalty diffs.', stdout.getvalue())
+        self.assertEqual(
+            set(models.ProgressLog.objects.filter(
+                event=models.ProgressEvent.WRONG_ANSWER,
+            ).values_list('penalty', flat=True)),
+            {timedelta(minutes=1)},
+        )
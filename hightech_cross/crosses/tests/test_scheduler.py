@@ -0,0 +1,93 @@
+from datetime import (
+    datetime,
+    timedelta,
+)
+
+from django.core.cache import cache as django_cache
+from django.test import TestCase
+from django.utils.timezone import now
+
+from .. import (
+    cache,
+    models,
+)
+from ..scheduler import CrossScheduler
+from ..sharding import get_shards
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+
+class RecordingScheduler(CrossScheduler):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.calls = []
+
+    def warm_up(self, cross: models.Cross) -> None:
+        self.calls.append(('warm_up', cross.id))
+
+    def finalize(self, cross: models.Cross) -> None:
+        self.calls.append(('finalize', cross.id))
+
+
+class CrossSchedulerTest(TestCase):
+    databases = set(get_shards())
+
+    def setUp(self):
+        django_cache.clear()
+        self.cross = create_cross(
+            [create_team('team1')],
+            begins_at=now() + timedelta(hours=1),
+        )
+        self.moment = now()
+        self.scheduler = RecordingScheduler(
+            clock=self.clock,
+            warm_up_before=timedelta(minutes=5),
+        )
+
+    def clock(self) -> datetime:
+        return self.moment
+
+    def test_nothing_due_long_before_start(self):
+        self.moment = self.cross.begins_at - timedelta(minutes=10)
+        self.scheduler.run_pending()
+        self.assertEqual(self.scheduler.calls, [])
+
+    def test_warm_up_once_before_start(self):
+        self.moment = self.cross.begins_at - timedelta(minutes=4)
+        self.scheduler.run_pending()
+        self.moment = self.cross.begins_at + timedelta(minutes=1)
+        self.scheduler.run_pending()
+        self.assertEqual(
+            self.scheduler.calls,
+            [('warm_up', self.cross.id)],
+        )
+
+    def test_finalize_once_at_end(self):
+        self.moment = self.cross.ends_at
+        self.scheduler.run_pending()
+        self.moment = self.cross.ends_at + timedelta(minutes=1)
+        self.scheduler.run_pending()
+        self.assertEqual(
+            self.scheduler.calls,
+            [('finalize', self.cross.id)],
+        )
+
+    def test_finalize_skipped_long_after_end(self):
+        self.moment = self.cross.ends_at + timedelta(minutes=10)
+        self.scheduler.run_pending()
+        self.assertEqual(self.scheduler.calls, [])
+
+    def test_hooks_fill_caches(self):
+        scheduler = CrossScheduler(
+            clock=self.clock,
+            warm_up_before=timedelta(minutes=5),
+        )
+        self.moment = self.cross.begins_at - timedelta(minutes=1)
+        scheduler.run_pending()
+        self.assertIsNotNone(cache.peek('cross-data', self.cross.id))
+        django_cache.clear()
+        self.moment = self.cross.ends_at
+        scheduler.run_pending()
+        self.assertIsNotNone(cache.peek('compact-data', self.cross.id))
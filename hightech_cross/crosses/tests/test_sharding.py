@@ -0,0 +1,73 @@
+import io
+import unittest
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils.timezone import now
+
+from .. import models
+from ..sharding import (
+    get_shards,
+    move_cross,
+)
+from .factories import (
+    create_cross,
+    create_log,
+    create_team,
+)
+
+
+@unittest.skipIf(
+    len(get_shards()) < 2,
+    'Run with CROSSES_SHARDS=shard1 to test sharding.',
+)
+class MoveCrossTest(TestCase):
+    databases = set(get_shards())
+
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+        self.mission = self.cross.missions.get(sn=1)
+        self.target = get_shards()[1]
+
+    def test_timestamps_survive(self):
+        moment = now() - timedelta(minutes=30)
+        logs = [
+            create_log(
+                self.mission,
+                self.team,
+                models.ProgressEvent.WRONG_ANSWER,
+                moment + timedelta(minutes=number),
+                text=str(number),
+            )
+            for number in range(3)
+        ]
+        move_cross(self.cross, self.target)
+        moved = models.ProgressLog.objects.using(self.target).filter(
+            mission__cross_id=self.cross.id,
+        )
+        self.assertEqual(
+            dict(moved.values_list('id', 'created_at')),
+            {log.id: log.created_at for log in logs},
+        )
+        self.assertFalse(models.ProgressLog.objects.using('default').filter(
+            mission__cross_id=self.cross.id,
+        ).exists())
+        field = models.ProgressLog._meta.get_field('created_at')
+        self.assertTrue(field.auto_now_add)
+
+    def test_join_codes_on_shard(self):
+        move_cross(self.cross, self.target)
+        cross = models.Cross.objects.using(self.target).get(id=self.cross.id)
+        stdout = io.StringIO()
+        call_command('generate_join_codes', str(cross.id), stdout=stdout)
+        join_code = models.JoinCode.objects.using(self.target).get(
+            cross_id=cross.id,
+        )
+        self.assertIn(f'team1: {join_code.code}', stdout.getvalue())
+        response = self.client.post('/api/tokens/', {'code': join_code.code})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['cross'], str(cross.id))
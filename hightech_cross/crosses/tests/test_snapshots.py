@@ -0,0 +1,110 @@
+import json
+import os
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache as django_cache
+from django.test import (
+    SimpleTestCase,
+    TestCase,
+    override_settings,
+)
+from rest_framework.test import APIClient
+
+from .. import (
+    budgets,
+    cache,
+    notifications,
+    snapshots,
+)
+from ..sharding import get_shards
+from .factories import (
+    create_cross,
+    create_team,
+)
+
+
+class PackTest(SimpleTestCase):
+    rendered = cache.Rendered(
+        None,
+        'a' * 40,
+        {'identity': b'{"a": 1}', 'gzip': b'\x1f\x8b...'},
+        read_at=1234.5,
+    )
+
+    def test_round_trip(self):
+        snapshot = snapshots.unpack(snapshots.pack(7, self.rendered))
+        self.assertEqual(snapshot.version, 7)
+        self.assertEqual(snapshot.rendered.etag, self.rendered.etag)
+        self.assertEqual(snapshot.rendered.read_at, 1234.5)
+        self.assertEqual(
+            {
+                encoding: body.tobytes()
+                for encoding, body in snapshot.rendered.bodies.items()
+            },
+            self.rendered.bodies,
+        )
+
+    def test_not_a_snapshot(self):
+        content = bytearray(snapshots.pack(1, self.rendered))
+        content[:4] = b'JUNK'
+        with self.assertRaises(ValueError):
+            snapshots.unpack(bytes(content))
+
+    def test_chunks(self):
+        body = os.urandom(snapshots.CHUNK_SIZE * 2 + 10)
+        chunks = list(snapshots.iter_chunks(memoryview(body)))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b''.join(chunks), body)
+
+
+class SnapshotReadTest(TestCase):
+    databases = set(get_shards())
+
+    def setUp(self):
+        django_cache.clear()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(
+            CROSSES_SNAPSHOT_DIR=directory.name,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        snapshots._heartbeat_checked_at = 0.0
+        snapshots._mapped.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+        snapshots.SnapshotWriter(directory.name).run_once()
+
+    def test_read_published(self):
+        rendered = snapshots.read(self.cross.id)
+        expected = cache.get_cross_data(self.cross)
+        self.assertEqual(rendered.etag, expected.etag)
+        self.assertEqual(
+            rendered.bodies['identity'].tobytes(),
+            expected.bodies['identity'],
+        )
+
+    def test_stale_after_local_drop(self):
+        notifications.drop([f'crosses:cross-data:{self.cross.id}'])
+        self.assertTrue(snapshots.read(self.cross.id).stale)
+        self.assertFalse(snapshots.read(self.cross.id, compact=True).stale)
+        client = APIClient()
+        client.force_authenticate(self.team)
+        with mock.patch.object(
+            budgets,
+            'get_leaderboard_data',
+            side_effect=AssertionError('Leaderboard computed'),
+        ):
+            response = client.get(f'/api/crosses/{self.cross.id}/')
+        self.assertEqual(response['Warning'], budgets.STALE_WARNING)
+
+    def test_response_streamed(self):
+        client = APIClient()
+        client.force_authenticate(self.team)
+        django_cache.clear()
+        response = client.get(f'/api/crosses/{self.cross.id}/')
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content)
+        self.assertEqual(int(response['Content-Length']), len(content))
+        self.assertEqual(json.loads(content)['id'], str(self.cross.id))
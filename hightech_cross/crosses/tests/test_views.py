@@ -0,0 +1,378 @@
+import base64
+import typing as t
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+from rest_framework.test import APIClient
+
+from .. import models
+from ..views import (
+    ANSWERS_PAGE_SIZE,
+    PROGRESS_PAGE_SIZE,
+    AnswerViewSet,
+)
+from .factories import (
+    create_cross,
+    create_log,
+    create_team,
+)
+
+
+class MissionEndpointsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+        self.client = APIClient()
+        self.client.force_authenticate(self.team)
+
+    def test_catalog_of_started_cross(self):
+        response = self.client.get(
+            f'/api/crosses/{self.cross.id}/missions/catalog/',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [mission['sn'] for mission in response.json()['missions']],
+            [1, 2, 3],
+        )
+
+    def test_catalog_revalidation(self):
+        url = f'/api/crosses/{self.cross.id}/missions/catalog/'
+        content_hash = self.client.get(url).json()['hash']
+        etag = f'W/"{content_hash}"'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['ETag'], etag)
+        for if_none_match in (
+            etag,
+            f'"{content_hash}"',
+            f'"other", {etag}',
+            '*',
+        ):
+            with self.subTest(if_none_match=if_none_match):
+                response = self.client.get(
+                    url,
+                    HTTP_IF_NONE_MATCH=if_none_match,
+                )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH='"other"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_catalog_of_cross_not_began(self):
+        cross = create_cross(
+            [self.team],
+            begins_at=now() + timedelta(hours=1),
+        )
+        for url in (
+            f'/api/crosses/{cross.id}/missions/catalog/',
+            f'/api/crosses/{cross.id}/missions/status/',
+            f'/api/crosses/{cross.id}/missions/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_catalog_of_other_teams_cross(self):
+        cross = create_cross([create_team('team2')])
+        for url in (
+            f'/api/crosses/{cross.id}/missions/catalog/',
+            f'/api/crosses/{cross.id}/missions/status/',
+            f'/api/crosses/{cross.id}/',
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_catalog_for_staff(self):
+        cross = create_cross(begins_at=now() + timedelta(hours=1))
+        self.client.force_authenticate(
+            create_team('organizer', is_staff=True),
+        )
+        response = self.client.get(
+            f'/api/crosses/{cross.id}/missions/catalog/',
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_prompts_taken_for_mission(self):
+        self.cross.missions.get(sn=2).get_prompt(self.team.id, 1)
+        for mission_sn, texts in ((1, [None, None]), (2, ['Prompt 1', None])):
+            with self.subTest(mission_sn=mission_sn):
+                response = self.client.get(
+                    f'/api/crosses/current/missions/{mission_sn}/prompts/',
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [prompt['text'] for prompt in response.json()],
+                    texts,
+                )
+
+    def test_taken_prompts_loaded_once(self):
+        self.cross.missions.get(sn=2).get_prompt(self.team.id, 1)
+        bigger_cross = create_cross([self.team], missions=6)
+        bigger_cross.missions.get(sn=5).get_prompt(self.team.id, 2)
+        for cross in (self.cross, bigger_cross):
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(
+                    f'/api/crosses/{cross.id}/missions/',
+                )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                len([
+                    query
+                    for query in queries.captured_queries
+                    if f"'{models.ProgressEvent.GET_PROMPT}'" in query['sql']
+                ]),
+                1,
+            )
+        self.assertEqual(
+            [
+                [prompt['text'] for prompt in mission['prompts']]
+                for mission in response.json()
+            ],
+            [[None, None]] * 4 + [[None, 'Prompt 2'], [None, None]],
+        )
+
+    def test_status_with_answers(self):
+        url = '/api/crosses/current/missions/1/answers/'
+        self.client.post(url, {'text': 'wrong'})
+        self.client.post(url, {'text': 'answer1'})
+        response = self.client.get('/api/crosses/current/missions/status/')
+        self.assertEqual(response.status_code, 200)
+        stati = response.json()
+        self.assertEqual(
+            [
+                (answer['text'], answer['is_right'])
+                for answer in stati['1']['answers']
+            ],
+            [('wrong', False), ('answer1', True)],
+        )
+        self.assertTrue(stati['1']['finished'])
+        self.assertEqual(stati['2'], {
+            'answers': [],
+            'finished': False,
+            'penalty': '00:00:00',
+        })
+
+
+class AnalyticsEndpointTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.cross = create_cross([self.team])
+        self.client = APIClient()
+
+    def test_by_cross_id_for_staff(self):
+        self.client.force_authenticate(
+            create_team('organizer', is_staff=True),
+        )
+        response = self.client.get(
+            f'/api/crosses/{self.cross.id}/analytics/',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [mission['sn'] for mission in response.json()['missions']],
+            [1, 2, 3],
+        )
+
+    def test_forbidden_for_teams(self):
+        self.client.force_authenticate(self.team)
+        response = self.client.get(
+            f'/api/crosses/{self.cross.id}/analytics/',
+        )
+        self.assertEqual(response.status_code, 403)
+
+
+class ProgressSyncTest(TestCase):
+    url = '/api/crosses/current/progress/'
+
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.other_team = create_team('team2')
+        self.cross = create_cross([self.team, self.other_team])
+        self.missions = list(self.cross.missions.all())
+        self.client = APIClient()
+        self.client.force_authenticate(self.team)
+
+    def sync(self, since: t.Optional[str] = None) -> t.Dict[str, t.Any]:
+        params = {'since': since} if since else {}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_late_commit_is_not_skipped(self):
+        moment = now()
+        create_log(
+            self.missions[0],
+            self.team,
+            models.ProgressEvent.WRONG_ANSWER,
+            moment - timedelta(seconds=2),
+            text='first',
+        )
+        first = self.sync()
+        self.assertEqual(len(first['events']), 1)
+        create_log(
+            self.missions[0],
+            self.team,
+            models.ProgressEvent.WRONG_ANSWER,
+            moment - timedelta(seconds=4),
+            text='late',
+        )
+        second = self.sync(first['cursor'])
+        self.assertEqual(
+            [event['details']['text'] for event in second['events']],
+            ['late'],
+        )
+        self.assertEqual(self.sync(second['cursor'])['events'], [])
+
+    def test_leaderboard_changed_once(self):
+        create_log(
+            self.missions[0],
+            self.other_team,
+            models.ProgressEvent.RIGHT_ANSWER,
+            now() - timedelta(minutes=1),
+        )
+        first = self.sync()
+        self.assertTrue(first['leaderboard_changed'])
+        second = self.sync(first['cursor'])
+        self.assertFalse(second['leaderboard_changed'])
+        create_log(
+            self.missions[1],
+            self.other_team,
+            models.ProgressEvent.RIGHT_ANSWER,
+            now() - timedelta(seconds=1),
+        )
+        third = self.sync(second['cursor'])
+        self.assertTrue(third['leaderboard_changed'])
+        self.assertEqual(third['events'], [])
+        self.assertFalse(self.sync(third['cursor'])['leaderboard_changed'])
+
+    def test_pages(self):
+        moment = now() - timedelta(minutes=10)
+        for number in range(PROGRESS_PAGE_SIZE + 5):
+            create_log(
+                self.missions[0],
+                self.team,
+                models.ProgressEvent.WRONG_ANSWER,
+                moment + timedelta(seconds=number),
+                text=str(number),
+            )
+        first = self.sync()
+        self.assertTrue(first['has_more'])
+        second = self.sync(first['cursor'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(
+            [
+                int(event['details']['text'])
+                for event in first['events'] + second['events']
+            ],
+            list(range(PROGRESS_PAGE_SIZE + 5)),
+        )
+
+    def test_last_log_cursor(self):
+        log = create_log(
+            self.missions[0],
+            self.team,
+            models.ProgressEvent.WRONG_ANSWER,
+            now() - timedelta(minutes=1),
+        )
+        since = base64.urlsafe_b64encode(
+            f'{log.created_at.isoformat()}|{log.id}'.encode(),
+        ).decode()
+        self.assertEqual(self.sync(since)['events'], [])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(self.url, {'since': 'nonsense'})
+        self.assertEqual(response.status_code, 400)
+
+
+class AnswerListTest(TestCase):
+    url = '/api/crosses/current/missions/1/answers/'
+
+    def setUp(self):
+        cache.clear()
+        self.team = create_team('team1')
+        self.other_team = create_team('team2')
+        self.cross = create_cross([self.team, self.other_team])
+        self.first, self.second = self.cross.missions.filter(
+            sn__in=[1, 2],
+        ).order_by('sn')
+        self.client = APIClient()
+        self.client.force_authenticate(self.team)
+        self.moment = now() - timedelta(minutes=30)
+
+    def answer(
+        self,
+        mission: models.Mission,
+        team: User,
+        number: int,
+    ) -> models.ProgressLog:
+        return create_log(
+            mission,
+            team,
+            models.ProgressEvent.WRONG_ANSWER,
+            self.moment + timedelta(seconds=number),
+            text=str(number),
+        )
+
+    def test_own_answers_to_mission(self):
+        self.answer(self.first, self.team, 1)
+        self.answer(self.first, self.other_team, 2)
+        self.answer(self.second, self.team, 3)
+        create_log(
+            self.first,
+            self.team,
+            models.ProgressEvent.GET_PROMPT,
+            self.moment,
+            sn=1,
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [
+                (answer['text'], answer['is_right'])
+                for answer in response.json()['results']
+            ],
+            [('1', False)],
+        )
+
+    def test_pages(self):
+        for number in range(ANSWERS_PAGE_SIZE + 5):
+            self.answer(self.first, self.team, number)
+        first = self.client.get(self.url).json()
+        self.assertEqual(len(first['results']), ANSWERS_PAGE_SIZE)
+        self.assertIsNone(first['previous'])
+        second = self.client.get(first['next']).json()
+        self.assertIsNone(second['next'])
+        self.assertEqual(
+            [
+                int(answer['text'])
+                for answer in first['results'] + second['results']
+            ],
+            list(range(ANSWERS_PAGE_SIZE + 5)),
+        )
+
+    def test_details_not_loaded(self):
+        self.answer(self.first, self.team, 1)
+        pages = []
+        paginate_queryset = AnswerViewSet.paginate_queryset
+
+        def record_page(view, queryset):
+            page = paginate_queryset(view, queryset)
+            pages.append(page)
+            return page
+
+        with mock.patch.object(
+            AnswerViewSet,
+            'paginate_queryset',
+            record_page,
+        ):
+            response = self.client.get(self.url)
+        self.assertEqual(response.json()['results'][0]['text'], '1')
+        [[log]] = pages
+        self.assertIn('details', log.get_deferred_fields())
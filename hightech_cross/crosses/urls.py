@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import (
     include,
     path,
@@ -27,8 +28,24 @@ prompt_router = routers.NestedSimpleRouter(
 )
 prompt_router.register(r'prompts', views.PromptViewSet)
 urlpatterns = [
+    path('tokens/', views.TokenView.as_view(), name='token'),
     path('', include(cross_router.urls)),
     path('', include(mission_router.urls)),
     path('', include(answer_router.urls)),
     path('', include(prompt_router.urls)),
 ]
+
+if settings.CROSSES_ASYNC_VIEWS:
+    from . import async_views
+
+    urlpatterns = [
+        path('crosses/current/', async_views.current_cross),
+        path(
+            'crosses/<str:cross_pk>/missions/',
+            async_views.mission_list,
+        ),
+        path(
+            'crosses/<str:cross_pk>/missions/<str:mission_pk>/prompts/',
+            async_views.prompt_list,
+        ),
+    ] + urlpatterns
@@ -1,59 +1,333 @@
 """Views and viewsets for `crosses` app."""
+import typing as t
 import uuid
+from datetime import timedelta
 
-from django.http import Http404
+from django.db.models.fields.json import KeyTextTransform
+from django.http import (
+    Http404,
+    HttpRequest,
+    HttpResponse,
+    StreamingHttpResponse,
+)
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
 from django.utils.timezone import now
 from rest_framework import (
     permissions,
     status,
     viewsets,
 )
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.renderers import JSONRenderer
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
 
-from . import models
+from . import (
+    budgets,
+    cache,
+    models,
+    sharding,
+    snapshots,
+)
+from .analytics import get_mission_analytics
+from .authentication import (
+    TokenUser,
+    make_token,
+)
+from .profiling import ProfilingMixin
 from .serializers import (
+    AnswerPageSerializer,
     AnswerSerializer,
+    CrossAnalyticsSerializer,
     CrossSerializer,
     MissionSerializer,
+    MissionStatusSerializer,
+    ProgressLogSerializer,
     PromptSerializer,
+    SyncCursor,
+    decode_cursor,
+    encode_cursor,
 )
 
+PROGRESS_PAGE_SIZE = 100
+SYNC_OVERLAP = timedelta(seconds=10)
+ANSWERS_PAGE_SIZE = 50
+COMPACT_MEDIA_TYPE = 'application/vnd.crosses.compact+json'
+
+
+class AnswerPagination(CursorPagination):
+    """Cursor pagination of team answers to a mission."""
+
+    page_size = ANSWERS_PAGE_SIZE
+    ordering = ('created_at', 'id')
+
+
+class CompactJSONRenderer(JSONRenderer):
+    """JSON renderer for compact leaderboard media type."""
+
+    media_type = COMPACT_MEDIA_TYPE
+
+
+def wants_compact(request: HttpRequest) -> bool:
+    """Learn if client asked for compact leaderboard."""
+    return (
+        request.GET.get('leaderboard') == 'compact'
+        or COMPACT_MEDIA_TYPE in request.META.get('HTTP_ACCEPT', '')
+    )
+
 
 def get_mission(cross_id: uuid.UUID, sn: int) -> models.Mission:
     """Shortcut to get mission by given args."""
-    mission = models.Mission.objects.filter(
+    mission = models.Mission.objects.using(
+        sharding.get_cross_db(cross_id),
+    ).filter(
         cross_id=cross_id,
         sn=sn,
+    ).select_related(
+        'cross',
     ).first()
     if mission is None:
         raise Http404
     return mission
 
 
+def choose_encoding(request: HttpRequest, encodings: t.Iterable[str]) -> str:
+    """Choose best of available content encodings accepted by client."""
+    accepted = set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        encoding, _, params = item.strip().partition(';')
+        if params.strip().replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00'):
+            continue
+        accepted.add(encoding.strip().lower())
+    for encoding in ('br', 'gzip'):
+        if encoding in encodings and encoding in accepted:
+            return encoding
+    return 'identity'
+
+
+def etag_matches(request: HttpRequest, etag: str) -> bool:
+    """Learn if `If-None-Match` header lists entity tag or `*`.
+
+    Tags are compared weakly, as required for `If-None-Match`.
+    """
+    header = request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    return any(
+        tag == '*' or tag.replace('W/', '', 1) == f'"{etag}"'
+        for tag in parse_etags(header)
+    )
+
+
+def rendered_response(
+    request: HttpRequest,
+    rendered: cache.Rendered,
+    content_type: str = 'application/json',
+) -> HttpResponse:
+    """Respond with pre-rendered JSON in best accepted encoding.
+
+    Entity tag is weak, as it is shared by all content encodings.
+    Shared snapshot bodies are streamed from memory they are mapped to.
+    Stale payloads are marked with `Warning` header.
+    """
+    if etag_matches(request, rendered.etag):
+        response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        encoding = choose_encoding(request, rendered.bodies)
+        body = rendered.bodies[encoding]
+        if isinstance(body, memoryview):
+            response = StreamingHttpResponse(
+                snapshots.iter_chunks(body),
+                content_type=content_type,
+            )
+            response['Content-Length'] = len(body)
+        else:
+            response = HttpResponse(body, content_type=content_type)
+        if encoding != 'identity':
+            response['Content-Encoding'] = encoding
+    response['ETag'] = f'W/"{rendered.etag}"'
+    if rendered.stale:
+        response['Warning'] = budgets.STALE_WARNING
+    patch_vary_headers(response, ['Accept', 'Accept-Encoding'])
+    return response
+
+
+def find_current_cross(user: t.Any) -> models.Cross:
+    """Get last of crosses ever started for user.
+
+    Token users are bound to the cross their token was issued for.
+    """
+    cross = cache.get_current_cross(
+        user.id,
+        user.cross_id if isinstance(user, TokenUser) else None,
+    )
+    if cross is None:
+        raise Http404
+    return cross
+
+
+def find_cross(user: t.Any, cross_id: str) -> models.Cross:
+    """Get cross by ID if it has started and user (team) takes part in it.
+
+    Word "current" stands for `find_current_cross`.
+    Token users see only the cross their token was issued for,
+    staff users see any cross.
+    """
+    if cross_id == 'current':
+        return find_current_cross(user)
+    try:
+        cross_id = uuid.UUID(str(cross_id))
+    except ValueError:
+        raise Http404
+    cross = cache.get_cross(cross_id)
+    if cross is None:
+        raise Http404
+    if user.is_staff:
+        return cross
+    if isinstance(user, TokenUser):
+        is_member = user.cross_id == cross.id
+    else:
+        is_member = any(
+            user_cross_id == cross.id
+            for _, user_cross_id in cache.get_user_crosses(user.id)
+        )
+    if not is_member or cross.begins_at > now():
+        raise Http404
+    return cross
+
+
+def get_cross_payload(cross: models.Cross, compact: bool) -> cache.Rendered:
+    """Get rendered cross info + leaderboard.
+
+    Shared snapshot is preferred to computing leaderboard in this worker.
+    """
+    return snapshots.read(
+        cross.id,
+        compact,
+    ) or budgets.get_leaderboard_data(cross, compact)
+
+
+def get_mission_list(
+    request: HttpRequest,
+    cross: models.Cross,
+) -> t.List[t.Dict[str, t.Any]]:
+    """Serialize mission stati of cross for user (team)."""
+    database = sharding.get_cross_db(cross.id)
+    missions = MissionViewSet.queryset.using(database).filter(
+        cross_id=cross.id,
+    )
+    with budgets.statement_timeout('missions', database):
+        return MissionSerializer(
+            missions,
+            many=True,
+            context={'request': request},
+        ).data
+
+
+def get_prompt_list(
+    request: HttpRequest,
+    cross: models.Cross,
+    mission_sn: str,
+) -> t.List[t.Dict[str, t.Any]]:
+    """Serialize mission prompts, texts are shown only for taken ones."""
+    mission = get_mission(cross_id=cross.id, sn=mission_sn)
+    return PromptSerializer(
+        mission.prompts.order_by('sn'),
+        many=True,
+        context={'request': request},
+    ).data
+
+
 class CurrentCrossMixin:
     def get_current_cross(self, user_id: uuid.UUID) -> models.Cross:
         """Get last of crosses ever started for user."""
-        cross = models.Cross.objects.filter(
-            users=user_id,
-            begins_at__lte=now(),
-        ).last()
-        if cross is None:
-            raise Http404
+        cross = find_current_cross(self.request.user)
         if 'cross_pk' in self.kwargs:
             self.kwargs['cross_pk'] = cross.id
         else:
             self.kwargs['pk'] = cross.id
         return cross
 
+    def get_cross(self, cross_pk: str) -> models.Cross:
+        """Get cross by ID or "current" alias if user can see it."""
+        if cross_pk == 'current':
+            return self.get_current_cross(self.request.user.id)
+        return find_cross(self.request.user, cross_pk)
+
 
-class CrossViewSet(CurrentCrossMixin, viewsets.ReadOnlyModelViewSet):
+class TokenView(APIView):
+    """Issue API token by one-time join code or for authenticated user.
+
+    Authenticated user gets token for given started cross it takes part in
+    or for its current cross.
+    """
+
+    permission_classes = [permissions.AllowAny]
+
+    def post(self, request: Request, *args, **kwargs) -> Response:
+        code = request.data.get('code')
+        if code:
+            for database in sharding.get_shards():
+                join_code = models.JoinCode.redeem(str(code), using=database)
+                if join_code is not None:
+                    break
+            if join_code is None:
+                return Response(
+                    {'code': 'Invalid or used code.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            user_id = join_code.user_id
+            cross_id = join_code.cross_id
+        elif request.user.is_authenticated:
+            user_id = request.user.id
+            cross_pk = request.data.get('cross')
+            if cross_pk:
+                cross_id = find_cross(request.user, str(cross_pk)).id
+            else:
+                cross_id = find_current_cross(request.user).id
+        else:
+            return Response(
+                {'code': 'This field is required.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        return Response(
+            {
+                'token': make_token(user_id, cross_id),
+                'cross': cross_id,
+            },
+            status=status.HTTP_201_CREATED,
+        )
+
+
+class CrossViewSet(
+    ProfilingMixin,
+    CurrentCrossMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     queryset = models.Cross.objects.prefetch_related(
         'users',
         'missions',
     )
     serializer_class = CrossSerializer
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [
+        *api_settings.DEFAULT_RENDERER_CLASSES,
+        CompactJSONRenderer,
+    ]
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        queryset = self.filter_queryset(self.get_queryset())
+        crosses = [
+            cross
+            for database in sharding.get_shards()
+            for cross in queryset.using(database)
+        ]
+        serializer = self.get_serializer(crosses, many=True)
+        return Response(serializer.data)
 
     def retrieve(
         self,
@@ -61,20 +335,121 @@ class CrossViewSet(CurrentCrossMixin, viewsets.ReadOnlyModelViewSet):
         pk: str,
         *args,
         **kwargs,
+    ) -> HttpResponse:
+        instance = self.get_cross(pk)
+        compact = wants_compact(request)
+        if isinstance(request.accepted_renderer, JSONRenderer):
+            return rendered_response(
+                request,
+                get_cross_payload(instance, compact),
+                request.accepted_renderer.media_type,
+            )
+        rendered = budgets.get_leaderboard_data(instance, compact)
+        response = Response(rendered.data)
+        if rendered.stale:
+            response['Warning'] = budgets.STALE_WARNING
+        return response
+
+    @action(detail=True, permission_classes=[permissions.IsAdminUser])
+    def analytics(
+        self,
+        request: Request,
+        pk: str,
+        *args,
+        **kwargs,
     ) -> Response:
-        if pk == 'current':
-            instance = self.get_current_cross(request.user.id)
-        else:
-            instance = self.get_object()
-        serializer = self.get_serializer(instance)
-        return Response(serializer.data)
+        """Get rolled up mission stats for organizers."""
+        cross = self.get_cross(pk)
+        return Response(CrossAnalyticsSerializer(
+            get_mission_analytics(cross),
+        ).data)
+
+    @action(detail=True)
+    def progress(
+        self,
+        request: Request,
+        pk: str,
+        *args,
+        **kwargs,
+    ) -> Response:
+        """Get user progress events newer than `since` cursor.
 
+        Returned cursor should be passed as `since` on next sync.
+        Logs may commit a bit after their creation date, so logs created
+        within `SYNC_OVERLAP` before sync are looked through again
+        on the next one and those synced already are skipped by ID.
+        """
+        cross = self.get_cross(pk)
+        database = sharding.get_cross_db(cross.id)
+        settled = now() - SYNC_OVERLAP
+        logs = models.ProgressLog.objects.using(database).filter(
+            mission__cross_id=cross.id,
+        )
+        since = request.query_params.get('since')
+        cursor = None
+        if since:
+            cursor = decode_cursor(since)
+            logs = logs.filter(
+                created_at__gte=cursor.watermark,
+            ).exclude(
+                id__in=list(cursor.seen),
+            )
+        right_answers = logs.filter(event=models.ProgressEvent.RIGHT_ANSWER)
+        with budgets.statement_timeout('progress', database):
+            events = list(logs.filter(
+                user_id=request.user.id,
+            ).select_related(
+                'mission',
+            ).order_by(
+                'created_at',
+                'id',
+            )[:PROGRESS_PAGE_SIZE + 1])
+            has_more = len(events) > PROGRESS_PAGE_SIZE
+            events = events[:PROGRESS_PAGE_SIZE]
+            watermark = settled
+            if has_more:
+                right_answers = right_answers.filter(
+                    created_at__lte=events[-1].created_at,
+                )
+                watermark = min(events[-1].created_at, settled)
+            if cursor is not None:
+                watermark = max(watermark, cursor.watermark)
+            leaderboard_changed = right_answers.exists()
+            seen = {
+                log_id: created_at
+                for log_id, created_at in right_answers.filter(
+                    created_at__gte=watermark,
+                ).values_list(
+                    'id',
+                    'created_at',
+                )
+            }
+        if cursor is not None:
+            seen.update(cursor.seen)
+        seen.update((event.id, event.created_at) for event in events)
+        return Response({
+            'cursor': encode_cursor(SyncCursor(
+                watermark,
+                {
+                    log_id: created_at
+                    for log_id, created_at in seen.items()
+                    if created_at >= watermark
+                },
+            )),
+            'has_more': has_more,
+            'events': ProgressLogSerializer(events, many=True).data,
+            'leaderboard_changed': leaderboard_changed,
+        })
 
-class MissionViewSet(CurrentCrossMixin, viewsets.ReadOnlyModelViewSet):
-    queryset = models.Mission.objects.filter(
-        cross__begins_at__lt=now(),
-    ).prefetch_related(
+
+class MissionViewSet(
+    ProfilingMixin,
+    CurrentCrossMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
+    queryset = models.Mission.objects.prefetch_related(
         'progress_logs',
+        'prompts',
     )
     serializer_class = MissionSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -87,8 +462,7 @@ class MissionViewSet(CurrentCrossMixin, viewsets.ReadOnlyModelViewSet):
         *args,
         **kwargs,
     ) -> Response:
-        if cross_pk == 'current':
-            cross_pk = self.get_current_cross(request.user.id).id
+        cross_pk = self.get_cross(cross_pk).id
         instance = get_mission(
             cross_id=cross_pk,
             sn=pk,
@@ -103,11 +477,47 @@ class MissionViewSet(CurrentCrossMixin, viewsets.ReadOnlyModelViewSet):
         *args,
         **kwargs,
     ) -> Response:
-        if cross_pk == 'current':
-            cross_pk = self.get_current_cross(request.user.id).id
-        missions = self.get_queryset().filter(cross_id=cross_pk)
-        serializer = self.get_serializer(missions, many=True)
-        return Response(serializer.data)
+        cross = self.get_cross(cross_pk)
+        return Response(get_mission_list(request, cross))
+
+    @action(detail=False)
+    def catalog(
+        self,
+        request: Request,
+        cross_pk: str,
+        *args,
+        **kwargs,
+    ) -> HttpResponse:
+        """Get static mission info with its content hash.
+
+        Clients are expected to cache it and send the hash back
+        in `If-None-Match` header as weak entity tag `W/"<hash>"`.
+        """
+        cross_pk = self.get_cross(cross_pk).id
+        rendered = cache.get_catalog(cross_pk)
+        if isinstance(request.accepted_renderer, JSONRenderer):
+            return rendered_response(request, rendered)
+        return Response(rendered.data)
+
+    @action(detail=False, url_path='status')
+    def stati(
+        self,
+        request: Request,
+        cross_pk: str,
+        *args,
+        **kwargs,
+    ) -> Response:
+        """Get dynamic mission stati for user keyed by mission s/n."""
+        cross = self.get_cross(cross_pk)
+        with budgets.statement_timeout(
+            'mission-status',
+            sharding.get_cross_db(cross.id),
+        ):
+            stati = cross.get_mission_stati(user_id=request.user.id)
+        return Response({
+            sn: MissionStatusSerializer(mission_status).data
+            for sn, mission_status in stati.items()
+        })
 
 
 class AnswerViewSet(
@@ -122,8 +532,9 @@ class AnswerViewSet(
     ))
     serializer_class = AnswerSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = AnswerPagination
 
-    def create(
+    def list(
         self,
         request: Request,
         cross_pk: str,
@@ -131,19 +542,45 @@ class AnswerViewSet(
         *args,
         **kwargs,
     ) -> Response:
-        if cross_pk == 'current':
-            cross_pk = self.get_current_cross(request.user.id).id
+        cross_pk = self.get_cross(cross_pk).id
         mission = get_mission(
             cross_id=cross_pk,
             sn=mission_pk,
         )
-        return Response(
-            mission.give_answer(
+        answers = mission.get_logs(request.user.id).filter(event__in=(
+            models.ProgressEvent.RIGHT_ANSWER,
+            models.ProgressEvent.WRONG_ANSWER,
+        )).annotate(
+            text=KeyTextTransform('text', 'details'),
+        ).only(
+            'id',
+            'mission',
+            'created_at',
+            'event',
+        )
+        page = self.paginate_queryset(answers)
+        serializer = AnswerPageSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    def create(
+        self,
+        request: Request,
+        cross_pk: str,
+        mission_pk: str,
+        *args,
+        **kwargs,
+    ) -> Response:
+        cross_pk = self.get_cross(cross_pk).id
+        with budgets.write_priority():
+            mission = get_mission(
+                cross_id=cross_pk,
+                sn=mission_pk,
+            )
+            is_right = mission.give_answer(
                 user_id=request.user.id,
                 text=request.data['text'],
-            ),
-            status=status.HTTP_201_CREATED,
-        )
+            )
+        return Response(is_right, status=status.HTTP_201_CREATED)
 
 
 class PromptViewSet(
@@ -166,16 +603,16 @@ class PromptViewSet(
         *args,
         **kwargs,
     ) -> Response:
-        if cross_pk == 'current':
-            cross_pk = self.get_current_cross(request.user.id).id
-        mission = get_mission(
-            cross_id=cross_pk,
-            sn=mission_pk,
-        )
-        prompt = mission.get_prompt(
-            user_id=request.user.id,
-            sn=pk,
-        )
+        cross_pk = self.get_cross(cross_pk).id
+        with budgets.write_priority():
+            mission = get_mission(
+                cross_id=cross_pk,
+                sn=mission_pk,
+            )
+            prompt = mission.get_prompt(
+                user_id=request.user.id,
+                sn=pk,
+            )
         if prompt is None:
             raise Http404
         serializer = self.get_serializer(prompt)
@@ -190,8 +627,7 @@ class PromptViewSet(
         *args,
         **kwargs,
     ) -> Response:
-        if cross_pk == 'current':
-            cross_pk = self.get_current_cross(request.user.id).id
+        cross_pk = self.get_cross(cross_pk).id
         mission = get_mission(
             cross_id=cross_pk,
             sn=mission_pk,
@@ -208,6 +644,5 @@ class PromptViewSet(
         *args,
         **kwargs,
     ) -> Response:
-        if cross_pk == 'current':
-            cross_pk = self.get_current_cross(request.user.id).id
-        return super().list(request, cross_pk, mission_pk, *args, **kwargs)
+        cross = self.get_cross(cross_pk)
+        return Response(get_prompt_list(request, cross, mission_pk))
@@ -83,9 +83,26 @@ DATABASES = {
         'PASSWORD': 'postgres',
         'HOST': 'postgres',
         'PORT': '5432',
+        # Keep connections of request and DB pool threads between jobs.
+        'CONN_MAX_AGE': 60,
     },
 }
 
+# Databases crosses are sharded over, extra ones are listed in
+# `CROSSES_SHARDS` env var like `shard1,shard2` and use the same server.
+CROSSES_SHARDS = ['default'] + [
+    shard
+    for shard in os.environ.get('CROSSES_SHARDS', '').split(',')
+    if shard
+]
+for shard in CROSSES_SHARDS[1:]:
+    DATABASES[shard] = {
+        **DATABASES['default'],
+        'NAME': f'hightech_cross_{shard}',
+    }
+
+DATABASE_ROUTERS = ['crosses.sharding.CrossShardRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
@@ -126,3 +143,65 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATIC_ROOT = 'static'
+
+
+# Django REST framework
+# https://www.django-rest-framework.org/api-guide/settings/
+
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'crosses.authentication.SignedTokenAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+    ],
+}
+
+# Signed API token lifetime in seconds.
+CROSSES_TOKEN_MAX_AGE = 60 * 60 * 24
+
+# Serve hot read endpoints with async views (enabled by `asgi.py`).
+CROSSES_ASYNC_VIEWS = bool(os.environ.get('CROSSES_ASYNC_VIEWS'))
+
+# DB thread pool size for async views.
+CROSSES_ASYNC_DB_THREADS = 8
+
+# Run cross lifecycle scheduler in every web worker process.
+CROSSES_SCHEDULER_THREAD = bool(os.environ.get('CROSSES_SCHEDULER_THREAD'))
+
+# Seconds between cross lifecycle scheduler checks.
+CROSSES_SCHEDULER_INTERVAL = 30
+
+# Seconds before cross start to warm up its caches.
+CROSSES_WARM_UP_BEFORE = 5 * 60
+
+# Tell other processes to drop changed cache entries via Postgres NOTIFY.
+CROSSES_CACHE_NOTIFY = True
+
+# Listen to cache notifications in every web worker process,
+# turned off with `CROSSES_CACHE_LISTENER=0` env var.
+CROSSES_CACHE_LISTENER = os.environ.get('CROSSES_CACHE_LISTENER') != '0'
+
+# Cache entry lifetime in seconds while listener is not running.
+CROSSES_UNLISTENED_CACHE_TIMEOUT = 5
+
+# Share of API requests to profile, staff can ask by `X-Profile` header.
+CROSSES_PROFILE_SAMPLE_RATE = 0.0
+
+# Statement timeouts of read endpoints in milliseconds.
+CROSSES_STATEMENT_TIMEOUTS = {
+    'cross': 2000,
+    'progress': 1000,
+    'missions': 2000,
+    'mission-status': 1000,
+    'leaderboard-refresh': 30000,
+}
+
+# Leaderboards computed at once by a process, more requests get stale ones.
+CROSSES_MAX_LEADERBOARD_BUILDS = 2
+
+# Directory for leaderboard snapshots shared by worker processes
+# (like `/dev/shm/hightech_cross`), disabled if not set.
+CROSSES_SNAPSHOT_DIR = os.environ.get('CROSSES_SNAPSHOT_DIR') or None
+
+# Seconds between leaderboard snapshot publications.
+CROSSES_SNAPSHOT_INTERVAL = 1
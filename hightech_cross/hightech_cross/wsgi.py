@@ -14,3 +14,20 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hightech_cross.settings')
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.CROSSES_SCHEDULER_THREAD:
+    from crosses.scheduler import start_scheduler_thread
+
+    start_scheduler_thread()
+
+if settings.CROSSES_CACHE_LISTENER:
+    from crosses.notifications import start_listener_thread
+
+    start_listener_thread()
+
+if settings.CROSSES_SNAPSHOT_DIR:
+    from crosses.snapshots import start_writer_thread
+
+    start_writer_thread()